@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from argparse import Namespace
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+from benchmarks.fake_postgrest import FAKE_KEY, FakePostgrest
+from benchmarks.fixtures import FixtureSite, inci_names
+
+PDF_PATH = os.path.abspath("files/COSING_PROHIBITED_ANNEX_2.pdf")
+
+DESCRIPTION = """Offline scraper/loader benchmarks: the real scraper code runs against a
+local fixture site and a fake PostgREST server, in a temporary working
+directory so journals and caches under files/ start cold."""
+
+@dataclass
+class Context:
+    site: FixtureSite
+    db: FakePostgrest
+    mode: str
+    concurrency: int
+    rows: int
+
+@dataclass
+class Result:
+    name: str
+    rows: int = 0
+    seconds: float = 0.0
+    site_requests: int = 0
+    db: dict = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def per_row(self, value: float) -> float:
+        return value / self.rows if self.rows else 0.0
+
+async def cosmos_certified(ctx: Context) -> int:
+    from scrapers.cosmos_certified import scrape_cosmos_certified
+    rows = await scrape_cosmos_certified(
+        url_template=ctx.site.url("/cosmos/ingredients?page={page}"),
+        concurrency=ctx.concurrency, mode=ctx.mode,
+    )
+    return len(rows)
+
+async def scrape_brand_profile(ctx: Context) -> int:
+    # Lewat scrape_profiles: worker pool yang memanggil scrape_brand_profile per link
+    from scrapers.bcorp import scrape_profiles
+    links = [ctx.site.url(f"/bcorp/profile/{i}") for i in range(ctx.site.profiles)]
+    brands, _ = await scrape_profiles(links, ctx.concurrency)
+    return len(brands)
+
+async def cosmos_products_main(ctx: Context) -> int:
+    from scrapers import cosmos_products
+    args = Namespace(start=1, end=None, resume=False, concurrency=ctx.concurrency, mode=ctx.mode)
+    await cosmos_products.main(args, url_template=ctx.site.url("/cosmos/products?page={page}"))
+    return len(ctx.db.tables.get("products", []))
+
+def clean_duplicates(ctx: Context) -> int:
+    from scrapers.clean_duplicates import clean_duplicates
+    rng = random.Random(1)
+    rows = []
+    for name in inci_names(ctx.rows, seed=1):
+        rows.append({"inci_name": name, "natural_origin_pct": rng.randint(0, 100), "restriction": None, "data_source": "bench"})
+        # Kira-kira seperlima punya varian ejaan yang harus digabung
+        if rng.random() < 0.2:
+            rows.append({"inci_name": f"  {name.lower()} ", "natural_origin_pct": rng.randint(0, 100), "restriction": "Leave-on only", "data_source": "bench"})
+    ctx.db.seed("ingredient_master", rows)
+    clean_duplicates()
+    # Restriction string harus masuk utuh ke list hasil merge, bukan dipecah per karakter
+    bad = [row["restriction"] for row in ctx.db.tables["ingredient_master"] if row["restriction"] not in (None, ["Leave-on only"])]
+    if bad:
+        raise RuntimeError(f"{len(bad)} rows with a mangled restriction, e.g. {bad[0]!r}")
+    return len(rows)
+
+async def http_parity(ctx: Context) -> int:
+    # Halaman COSMOS yang disimpan harus menghasilkan baris yang sama lewat httpx dan browser
+    from scrapers import cosmos_approved, cosmos_certified
+    from scrapers.paginated import scrape_table_pages
+    url = ctx.site.url("/saved/cosmos_certified_raw_materials?page={page}")
+    rows = 0
+    for scraper in (cosmos_certified, cosmos_approved):
+        http, browser = [
+            await scrape_table_pages(url, scraper.COLUMNS, scraper.build_row, 1, 1, mode=mode)
+            for mode in ("http", "browser")
+        ]
+        if not http or http != browser:
+            raise RuntimeError(f"{scraper.__name__}: http rows {http[:2]} != browser rows {browser[:2]}")
+        rows += len(http)
+    return rows
+
+def extract_cas_numbers(ctx: Context) -> int:
+    from scrapers.cosing_prohibited_list import extract_cas_numbers
+    return len(extract_cas_numbers(PDF_PATH))
+
+BENCHMARKS: dict[str, Callable] = {
+    "cosmos_certified": cosmos_certified,
+    "scrape_brand_profile": scrape_brand_profile,
+    "cosmos_products_main": cosmos_products_main,
+    "clean_duplicates": clean_duplicates,
+    "http_parity": http_parity,
+    "extract_cas_numbers": extract_cas_numbers,
+}
+
+def run_one(name: str, ctx: Context, verbose: bool = False) -> Result:
+    bench = BENCHMARKS[name]
+    ctx.db.clear()
+    ctx.site.reset()
+    result = Result(name)
+    out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    try:
+        with out:
+            if asyncio.iscoroutinefunction(bench):
+                result.rows = asyncio.run(bench(ctx))
+            else:
+                result.rows = bench(ctx)
+    except Exception as e:
+        # Pesan Playwright bisa berbaris-baris; cukup baris pertama
+        result.error = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+    result.seconds = time.perf_counter() - started
+    result.site_requests = ctx.site.requests
+    result.db = ctx.db.stats()
+    return result
+
+def report(results: list[Result]) -> str:
+    lines = [
+        f"{'benchmark':<22} {'rows':>7} {'seconds':>8} {'rows/s':>9} {'site req/row':>12} "
+        f"{'db req/row':>10} {'db KB sent':>10}"
+    ]
+    for r in results:
+        if r.error:
+            lines.append(f"{r.name:<22} failed: {r.error}")
+            continue
+        lines.append(
+            f"{r.name:<22} {r.rows:>7} {r.seconds:>8.2f} {r.rows_per_sec:>9.1f} "
+            f"{r.per_row(r.site_requests):>12.3f} {r.per_row(r.db['db_requests']):>10.4f} "
+            f"{r.db['db_request_bytes'] / 1024:>10.1f}"
+        )
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=DESCRIPTION)
+    parser.add_argument("names", nargs="*", metavar="BENCHMARK",
+                        help=f"benchmarks to run ({', '.join(BENCHMARKS)}); default: all")
+    parser.add_argument("--pages", type=int, default=20, help="pages per paginated fixture listing")
+    parser.add_argument("--rows-per-page", type=int, default=50)
+    parser.add_argument("--profiles", type=int, default=100, help="B Corp profile pages")
+    parser.add_argument("--rows", type=int, default=5000, help="ingredient_master rows for clean_duplicates")
+    parser.add_argument("--mode", choices=("browser", "http", "auto"), default="browser", help="fetch mode of the COSMOS crawls")
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the scrapers' own output")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    names = args.names or list(BENCHMARKS)
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    site = FixtureSite(args.pages, args.rows_per_page, args.profiles)
+    with site, FakePostgrest() as db, tempfile.TemporaryDirectory() as workdir:
+        # Client Supabase dibuat lazy, jadi cukup arahkan env ke server palsu
+        os.environ["SUPABASE_URL"] = db.url
+        os.environ["SUPABASE_KEY"] = FAKE_KEY
+        os.environ.pop("API_URL", None)
+        os.chdir(workdir)
+        os.makedirs("files", exist_ok=True)
+
+        ctx = Context(site, db, args.mode, args.concurrency, args.rows)
+        results = []
+        for name in names:
+            print(f"Running {name}...", flush=True)
+            results.append(run_one(name, ctx, args.verbose))
+
+    print()
+    print(report(results))
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump([{**asdict(r), "rows_per_sec": r.rows_per_sec} for r in results], f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import json
+import re
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# supabase-py cuma butuh key yang tidak kosong
+FAKE_KEY = "bench.fake.key"
+
+@dataclass
+class Call:
+    method: str
+    table: str
+    rows: int
+    request_bytes: int
+    response_bytes: int
+
+def _value(raw: str):
+    try:
+        return int(raw)
+    except ValueError:
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+
+def _like(pattern: str) -> re.Pattern:
+    # PostgREST pakai * sebagai wildcard di URL; % dan _ di-escape dengan \
+    out, escaped = "", False
+    for ch in pattern:
+        if escaped:
+            out += re.escape(ch)
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch in "*%":
+            out += ".*"
+        elif ch == "_":
+            out += "."
+        else:
+            out += re.escape(ch)
+    return re.compile(f"^{out}$", re.IGNORECASE | re.DOTALL)
+
+def _matches(row: dict, column: str, expr: str) -> bool:
+    op, _, raw = expr.partition(".")
+    value = row.get(column)
+    if op == "eq":
+        return value == _value(raw) or str(value) == raw
+    if op in ("gt", "gte", "lt", "lte"):
+        if value is None:
+            return False
+        target = _value(raw)
+        if isinstance(value, str) != isinstance(target, str):
+            value, target = str(value), str(target)
+        return {"gt": value > target, "gte": value >= target, "lt": value < target, "lte": value <= target}[op]
+    if op == "in":
+        items = [_value(item.strip('"')) for item in raw.strip("()").split(",") if item]
+        return value in items
+    if op == "ilike":
+        return value is not None and bool(_like(raw).match(str(value)))
+    if op == "is":
+        return value is None if raw == "null" else value == (raw == "true")
+    raise ValueError(f"fake PostgREST: unsupported filter {column}={expr}")
+
+class FakePostgrest:
+    """In-memory stand-in for the Supabase REST API (PostgREST subset).
+
+    Supports what the scrapers use: select with order/limit and eq, gt(e),
+    lt(e), in, ilike and is filters; insert; upsert with on_conflict; and
+    delete by filter. Every call is recorded with its row count and request
+    and response sizes, so benchmarks can report DB round-trips per row.
+
+        with FakePostgrest() as db:
+            os.environ["SUPABASE_URL"] = db.url
+    """
+
+    def __init__(self, tables: dict[str, list[dict]] | None = None):
+        self.tables: dict[str, list[dict]] = {}
+        self.next_id: dict[str, int] = {}
+        self.calls: list[Call] = []
+        self.lock = threading.Lock()
+        for table, rows in (tables or {}).items():
+            self.seed(table, rows)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def seed(self, table: str, rows: list[dict]):
+        with self.lock:
+            for row in rows:
+                self._insert(table, dict(row))
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls.clear()
+
+    def clear(self):
+        """Drop every table and recorded call, e.g. between benchmarks."""
+        with self.lock:
+            self.tables.clear()
+            self.next_id.clear()
+            self.calls.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            calls = list(self.calls)
+        return {
+            "db_requests": len(calls),
+            "db_request_bytes": sum(c.request_bytes for c in calls),
+            "db_response_bytes": sum(c.response_bytes for c in calls),
+            "db_by_method": {m: sum(c.method == m for c in calls) for m in sorted({c.method for c in calls})},
+        }
+
+    def _insert(self, table: str, row: dict) -> dict:
+        rows = self.tables.setdefault(table, [])
+        if row.get("id") is None:
+            row["id"] = self.next_id.get(table, 1)
+        self.next_id[table] = max(self.next_id.get(table, 1), row["id"] + 1)
+        rows.append(row)
+        return row
+
+    def _select(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        rows = self.tables.get(table, [])
+        columns, order, limit = None, None, None
+        for key, value in params:
+            if key == "select":
+                columns = None if value == "*" else value.split(",")
+            elif key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key not in ("on_conflict", "columns", "offset"):
+                rows = [row for row in rows if _matches(row, key, value)]
+        if order:
+            column, _, direction = order.partition(".")
+            rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith("desc"))
+        if limit is not None:
+            rows = rows[:limit]
+        if columns:
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+        return rows
+
+    def _write(self, table: str, payload, params: dict, prefer: str) -> list[dict]:
+        rows = payload if isinstance(payload, list) else [payload]
+        on_conflict = params.get("on_conflict") if "merge-duplicates" in prefer else None
+        existing = self.tables.setdefault(table, [])
+        index = {row.get(on_conflict): row for row in existing} if on_conflict else {}
+        written = []
+        for row in rows:
+            target = index.get(row.get(on_conflict)) if on_conflict else None
+            if target is not None:
+                target.update(row)
+                written.append(target)
+            else:
+                new = self._insert(table, dict(row))
+                if on_conflict:
+                    index[new.get(on_conflict)] = new
+                written.append(new)
+        return written
+
+    def _delete(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        doomed = {id(row) for row in self._select(table, params)}
+        rows = self.tables.get(table, [])
+        removed = [row for row in rows if id(row) in doomed]
+        self.tables[table] = [row for row in rows if id(row) not in doomed]
+        return removed
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive seperti Supabase asli, biar jumlah koneksi gak ikut terukur
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method: str):
+                url = urlsplit(self.path)
+                table = url.path.rstrip("/").rsplit("/", 1)[-1]
+                params = parse_qsl(url.query, keep_blank_values=True)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                prefer = self.headers.get("Prefer", "")
+                try:
+                    with fake.lock:
+                        if method == "GET":
+                            result = fake._select(table, params)
+                        elif method == "POST":
+                            result = fake._write(table, json.loads(body or b"[]"), dict(params), prefer)
+                        elif method == "PATCH":
+                            result = [row for row in fake._select(table, params)]
+                            for row in result:
+                                row.update(json.loads(body))
+                        elif method == "DELETE":
+                            result = fake._delete(table, params)
+                        else:
+                            raise ValueError(f"fake PostgREST: unsupported method {method}")
+                    status = 201 if method == "POST" else 200
+                    out = json.dumps(result if method == "GET" or "return=representation" in prefer else [], default=str).encode()
+                except Exception as e:
+                    status, result = 400, []
+                    out = json.dumps({"message": str(e), "code": "FAKE", "details": None, "hint": None}).encode()
+
+                with fake.lock:
+                    fake.calls.append(Call(method, table, len(result), len(body), len(out)))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PATCH(self):
+                self._handle("PATCH")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        return Handler
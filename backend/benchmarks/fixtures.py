@@ -0,0 +1,163 @@
+import html
+import os
+import random
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+WORDS = [
+    "SODIUM", "LAURYL", "SULFATE", "GLYCERIN", "TOCOPHERYL", "ACETATE", "CETEARYL",
+    "ALCOHOL", "EXTRACT", "LEAF", "OIL", "SEED", "BUTTER", "HYDROGENATED", "POLYGLYCERYL",
+    "STEARATE", "CITRIC", "ACID", "ROSA", "CANINA", "FRUIT", "ALOE", "BARBADENSIS", "JUICE",
+]
+
+# Halaman listing yang disimpan, untuk membandingkan mode http dengan browser
+PAGES_DIR = os.path.join(os.path.dirname(__file__), "pages")
+
+def inci_names(count: int, seed: int = 0) -> list[str]:
+    """`count` distinct synthetic INCI names (deterministic per `seed`)."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        names.add(f"{words} {rng.randint(1, 999)}" if rng.random() < 0.5 else words)
+    return sorted(names)
+
+def _cells(values: list, tag: str = "td") -> str:
+    return "".join(f"<{tag}>{html.escape(str(v))}</{tag}>" for v in values)
+
+def _page(body: str) -> str:
+    return f"<!doctype html><html><head><title>fixture</title></head><body>{body}</body></html>"
+
+class FixtureSite:
+    """Local HTTP server with synthetic COSMOS, B Corp and SIN List pages.
+
+    The markup matches what the scrapers select on, so they can run against
+    it unchanged by passing `url(...)` templates instead of the real sites:
+
+    - /cosmos/ingredients?page=N: COSMOS raw-material table (columns used by
+      both cosmos_certified and cosmos_approved), empty after `pages`
+    - /cosmos/products?page=N: table#product-table with a th per row
+    - /bcorp/profile/<i>: a B Corp profile page
+    - /sin: one SIN List page
+    - /saved/<name>?page=1: PAGES_DIR/<name>.html as saved; other pages 404
+
+    Requests are counted per route in `hits`.
+    """
+
+    def __init__(self, pages: int = 20, rows_per_page: int = 50, profiles: int = 100, seed: int = 0):
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.profiles = profiles
+        self.names = inci_names(pages * rows_per_page, seed)
+        self.hits: Counter[str] = Counter()
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, route: str) -> str:
+        return self.base + route
+
+    @property
+    def requests(self) -> int:
+        return sum(self.hits.values())
+
+    def reset(self):
+        with self.lock:
+            self.hits.clear()
+            self.bytes_sent = 0
+
+    def page_rows(self, page: int) -> range:
+        if not 1 <= page <= self.pages:
+            return range(0)
+        start = (page - 1) * self.rows_per_page
+        return range(start, start + self.rows_per_page)
+
+    def ingredients(self, page: int) -> str:
+        rows = []
+        for i in self.page_rows(page):
+            # 13 kolom: inci di 1, PEMO di 4, natural origin di 8, restriction di 9/12
+            cells = [f"RM-{i}", self.names[i], "Supplier", "Trade", f"{i % 30}%", "", "", "",
+                     f"{70 + i % 30}%", "Rinse-off only" if i % 7 == 0 else "", "", "", ""]
+            rows.append(f"<tr>{_cells(cells)}</tr>")
+        head = _cells([f"Col {i}" for i in range(13)], "th")
+        return _page(f"<table><thead><tr>{head}</tr></thead><tbody>{''.join(rows)}</tbody></table>")
+
+    def products(self, page: int) -> str:
+        rows = []
+        for i in self.page_rows(page):
+            brand = f"Brand {i // 10}"
+            company = f"Company {i // 40}"
+            rows.append(f"<tr><th>{i:05d} - Product {i}</th>{_cells(['COSMOS ORGANIC', brand, company])}</tr>")
+        head = _cells(["Product", "Signature", "Brand", "Company"], "th")
+        return _page(f"<table id='product-table'><thead><tr>{head}</tr></thead><tbody>{''.join(rows)}</tbody></table>")
+
+    def profile(self, i: int) -> str:
+        return _page(
+            f"<main><h1>Brand {i}</h1>"
+            "<div><span>Headquarters</span><div class='opacity-60'>"
+            f"<p>Region {i % 5} ,  Country {i % 12}</p></div></div>"
+            f"<div><span>Overall B Impact Score {80 + i % 70}.{i % 10}</span></div></main>"
+        )
+
+    def sin(self) -> str:
+        rows = "".join(
+            f"<tr>{_cells([self.names[i], f'{50 + i}-{i % 90:02d}-{i % 10}', 'EC', 'CMR, PBT'])}</tr>"
+            for i in range(min(len(self.names), self.rows_per_page))
+        )
+        return _page(f"<table><tbody>{rows}</tbody></table><ul><li class='paginationjs-next disabled'></li></ul>")
+
+    def render(self, path: str, query: dict) -> tuple[str, str] | None:
+        page = int(query.get("page", ["1"])[0])
+        if path == "/cosmos/ingredients":
+            return "cosmos_ingredients", self.ingredients(page)
+        if path == "/cosmos/products":
+            return "cosmos_products", self.products(page)
+        if path.startswith("/bcorp/profile/"):
+            i = int(path.rsplit("/", 1)[-1])
+            return ("bcorp_profile", self.profile(i)) if i < self.profiles else None
+        if path == "/sin":
+            return "sin", self.sin()
+        if path.startswith("/saved/") and page == 1:
+            name = os.path.basename(path)
+            saved = os.path.join(PAGES_DIR, f"{name}.html")
+            if os.path.exists(saved):
+                with open(saved, encoding="utf-8") as f:
+                    return "saved", f.read()
+        return None
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                rendered = site.render(url.path, parse_qs(url.query))
+                route, body = rendered if rendered else ("not_found", "not found")
+                data = body.encode()
+                with site.lock:
+                    site.hits[route] += 1
+                    site.bytes_sent += len(data)
+                self.send_response(200 if rendered else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -1,10 +1,88 @@
-from supabase import create_client
-from dotenv import load_dotenv
+import asyncio
 import os
+import threading
+import weakref
+from typing import TYPE_CHECKING
+import httpx
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient, Client
 
 load_dotenv()
 
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
\ No newline at end of file
+# Batas waktu request ke Supabase (detik); connect dibuat lebih pendek
+TIMEOUT = httpx.Timeout(float(os.getenv("SUPABASE_TIMEOUT", "30")), connect=10)
+# Percobaan ulang koneksi yang gagal dibuka; GET yang kena 503/520 sudah di-retry postgrest
+RETRIES = int(os.getenv("SUPABASE_RETRIES", "3"))
+LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20")),
+    max_keepalive_connections=10,
+)
+
+_client: "Client | None" = None
+_lock = threading.Lock()
+# Client async terikat ke event loop yang membuatnya
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
+
+def _credentials() -> tuple[str, str]:
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set (e.g. in backend/.env)")
+    return url, key
+
+def get_client() -> "Client":
+    """The shared sync client, created on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                # Import di sini: supabase lambat di-import, langkah offline gak butuh
+                from supabase import ClientOptions, create_client
+
+                url, key = _credentials()
+                http = httpx.Client(
+                    timeout=TIMEOUT,
+                    transport=httpx.HTTPTransport(retries=RETRIES, limits=LIMITS),
+                    follow_redirects=True,
+                )
+                _client = create_client(url, key, ClientOptions(postgrest_client_timeout=TIMEOUT, httpx_client=http))
+    return _client
+
+async def _create_async_client() -> "AsyncClient":
+    from supabase import AsyncClientOptions, acreate_client
+
+    url, key = _credentials()
+    http = httpx.AsyncClient(
+        timeout=TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(retries=RETRIES, limits=LIMITS),
+        follow_redirects=True,
+    )
+    return await acreate_client(url, key, AsyncClientOptions(postgrest_client_timeout=TIMEOUT, httpx_client=http))
+
+async def get_async_client() -> "AsyncClient":
+    """The pooled async client of the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    task = _async_clients.get(loop)
+    if task is None or (task.done() and (task.cancelled() or task.exception())):
+        # Simpan task-nya, bukan client: coroutine yang datang bareng menunggu task yang sama
+        task = _async_clients[loop] = loop.create_task(_create_async_client())
+    return await asyncio.shield(task)
+
+async def aclose():
+    """Close the async client of the running loop (e.g. on API shutdown)."""
+    task = _async_clients.pop(asyncio.get_running_loop(), None)
+    if task is not None and task.done() and not task.cancelled() and not task.exception():
+        await task.result().postgrest.session.aclose()
+
+class _LazyClient:
+    """Stand-in for the sync client that only connects on first attribute access.
+
+    Keeps `from database import supabase` working without credentials until a
+    query is actually made.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+supabase = _LazyClient()
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from database import get_async_client
+from scrapers.batch import iter_rows
+from scrapers.inci import clean_inci, normalize_inci
+
+FIELDS = (
+    "inci_name, natural_origin_pct, is_eu_banned, is_eu_restricted, "
+    "is_sin_list, sin_list_flags, restriction, data_source"
+)
+
+MAX_ENTRIES = int(os.getenv("INGREDIENT_CACHE_SIZE", "50000"))
+TTL = int(os.getenv("INGREDIENT_CACHE_TTL", "3600"))
+# Nama yang gak ketemu di-cache lebih pendek, biar data baru cepat kelihatan
+NEGATIVE_TTL = int(os.getenv("INGREDIENT_CACHE_NEGATIVE_TTL", "300"))
+# Dipakai juga sebagai max-age di header Cache-Control
+CLIENT_MAX_AGE = 300
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, object]:
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return False, None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value, ttl: float | None = None):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, keys: list[str] | None = None) -> int:
+        with self.lock:
+            if keys is None:
+                count = len(self.entries)
+                self.entries.clear()
+                return count
+            return sum(self.entries.pop(key, None) is not None for key in keys)
+
+cache = TTLCache(MAX_ENTRIES, TTL)
+
+class NameIndex:
+    """Normalized INCI key → stored spelling, for every name in ingredient_master.
+
+    Only `inci_name` is read, on first use and again once `ttl` seconds have
+    passed. `add` records names written since then without a reload.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.names: dict[str, str] | None = None
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            if self.names is None or time.monotonic() - self.loaded_at > self.ttl:
+                self.names = {}
+                for row in iter_rows("ingredient_master", "inci_name", prefetch=True):
+                    self.names.setdefault(normalize_inci(row["inci_name"]), row["inci_name"])
+                self.loaded_at = time.monotonic()
+            return self.names.get(key)
+
+    def add(self, names: list[str]):
+        with self.lock:
+            if self.names is not None:
+                for name in names:
+                    self.names[normalize_inci(name)] = name
+
+    def clear(self):
+        with self.lock:
+            self.names = None
+
+name_index = NameIndex(TTL)
+
+async def _fetch(inci: str) -> tuple[dict | None, bool]:
+    """Row of `inci` and whether a miss is definitive for its normalized key.
+
+    The name is first resolved to its stored spelling through the name
+    index, so "Aqua / Water" finds "AQUA/WATER". Names the index doesn't
+    know (rows added since it was loaded) are looked up by their own
+    spelling, case-insensitively.
+    """
+    key = normalize_inci(inci)
+    name = await asyncio.to_thread(name_index.get, key)
+    client = await get_async_client()
+    if name is not None:
+        res = await client.table("ingredient_master").select(FIELDS).eq("inci_name", name).limit(1).execute()
+        # Index-nya bilang ada tapi barisnya gak ketemu (baru dihapus/diganti): jangan di-cache
+        return (res.data[0] if res.data else None), False
+
+    # ilike tanpa wildcard = equals case-insensitive
+    pattern = clean_inci(inci).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    res = await client.table("ingredient_master").select(FIELDS).ilike("inci_name", pattern).limit(10).execute()
+    row = next((row for row in res.data if normalize_inci(row["inci_name"]) == key), None)
+    # Gak ada di index maupun di DB: key ini memang sudah dites
+    return row, True
+
+def etag_for(data: dict) -> str:
+    body = json.dumps(data, sort_keys=True, default=str).encode()
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+async def lookup(inci: str) -> tuple[dict | None, str | None]:
+    """Return (ingredient, etag) for `inci`, from the cache when possible."""
+    key = normalize_inci(inci)
+    hit, value = cache.get(key)
+    if hit:
+        return value
+
+    data, definitive = await _fetch(inci)
+    value = (data, etag_for(data) if data else None)
+    if data or definitive:
+        cache.set(key, value, ttl=None if data else NEGATIVE_TTL)
+    return value
+
+def invalidate(names: list[str] | None = None) -> int:
+    """Drop `names` (or everything) from the cache; returns the number dropped.
+
+    `names` are the stored spellings a sync wrote, so they go straight into
+    the name index; a full invalidation reloads it instead.
+    """
+    if names is None:
+        name_index.clear()
+        return cache.invalidate()
+    name_index.add(names)
+    return cache.invalidate([normalize_inci(name) for name in names])
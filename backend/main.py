@@ -1,13 +1,88 @@
-from fastapi import FastAPI
-from database import supabase
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+import database
+import ingredient_cache
+import scoring
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Refresh snapshot + tabel scoring di background, bukan di request
+    refresher = asyncio.create_task(scoring.refresh_loop())
+    yield
+    refresher.cancel()
+    await database.aclose()
+
+app = FastAPI(lifespan=lifespan)
+
+class ScoreRequest(BaseModel):
+    # Satu produk pakai `ingredients`, banyak produk pakai `products`
+    ingredients: list[str] | None = None
+    products: list[list[str]] | None = None
+    details: bool = True
+    # Cocokkan nama yang typo/beda urutan ke INCI terdekat
+    fuzzy: bool = False
 
 @app.get("/")
 def root():
     return {"message": "Lucera API"}
 
 @app.get("/test-db")
-def test_db():
-    response = supabase.table("brands").select("*").limit(1).execute()
-    return {"connected": True, "data": response.data}
\ No newline at end of file
+async def test_db():
+    client = await database.get_async_client()
+    response = await client.table("brands").select("*").limit(1).execute()
+    return {"connected": True, "data": response.data}
+
+# Handler yang CPU-bound atau bisa memuat tabel dari DB (get_table) sengaja
+# dibiarkan sync: FastAPI menjalankannya di threadpool, bukan di event loop.
+
+# Harus sebelum /ingredients/{inci:path}, kalau tidak "search" dianggap nama INCI
+@app.get("/ingredients/search")
+def search_ingredients(q: str, k: int = Query(default=5, ge=1, le=50), threshold: float = Query(default=0.5, ge=0, le=1)):
+    matches = scoring.get_table().fuzzy.search(q, k=k, threshold=threshold)
+    return {"query": q, "matches": [{"inci_name": name, "similarity": sim} for name, sim in matches]}
+
+@app.get("/ingredients/{inci:path}")
+async def get_ingredient(inci: str, request: Request, response: Response):
+    data, etag = await ingredient_cache.lookup(inci)
+    if data is None:
+        table = await run_in_threadpool(scoring.get_table)
+        suggestions = [name for name, _ in table.fuzzy.search(inci, k=3)]
+        raise HTTPException(
+            status_code=404,
+            detail={"message": f"Ingredient {inci!r} not found", "suggestions": suggestions},
+        )
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={ingredient_cache.CLIENT_MAX_AGE}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return data
+
+@app.post("/ingredients/cache/invalidate")
+def invalidate_ingredients(names: list[str] | None = None, x_cache_token: str | None = Header(default=None)):
+    # Dipanggil scraper setelah sync; tanpa body = kosongkan semua
+    token = os.getenv("CACHE_INVALIDATE_TOKEN")
+    if not token or x_cache_token != token:
+        raise HTTPException(status_code=403, detail="Invalid cache token")
+    # Tabel scoring cuma di-refresh kalau semuanya di-invalidate; sync per nama
+    # gak perlu memuat ulang seluruh tabel
+    if names is None:
+        scoring.invalidate()
+    return {"invalidated": ingredient_cache.invalidate(names)}
+
+@app.post("/score")
+def score(body: ScoreRequest):
+    products = body.products or []
+    if body.ingredients is not None:
+        products = [body.ingredients, *products]
+    if not products:
+        raise HTTPException(status_code=422, detail="Send `ingredients` or `products`")
+    return {"results": scoring.get_table().score(products, details=body.details, fuzzy=body.fuzzy)}
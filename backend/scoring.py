@@ -0,0 +1,179 @@
+import asyncio
+import functools
+import os
+import threading
+import numpy as np
+from scrapers.batch import iter_rows
+from scrapers.fuzzy import TrigramIndex
+from scrapers.inci import normalize_inci
+from scrapers import snapshot
+
+COLUMNS = "inci_name, natural_origin_pct, is_eu_banned, is_eu_restricted, is_sin_list"
+# Snapshot di-refresh dan tabel dibangun ulang di background setiap selang ini (detik)
+REFRESH_INTERVAL = int(os.getenv("SCORING_REFRESH_INTERVAL", "3600"))
+# Ambang default untuk nama yang diketik user (typo, urutan kata)
+FUZZY_THRESHOLD = 0.8
+
+class IngredientTable:
+    """ingredient_master as NumPy columns, keyed by normalized INCI name.
+
+    Every column ends with a sentinel row (no pct, no flags), so index -1 of
+    an unmatched name gathers neutral values.
+    """
+
+    def __init__(self, rows: list[dict]):
+        self.index: dict[str, int] = {}
+        names, pct, banned, restricted, sin = [], [], [], [], []
+        for row in rows:
+            key = normalize_inci(row["inci_name"])
+            if not key or key in self.index:
+                continue
+            self.index[key] = len(names)
+            names.append(row["inci_name"])
+            pct.append(np.nan if row["natural_origin_pct"] is None else row["natural_origin_pct"])
+            banned.append(bool(row["is_eu_banned"]))
+            restricted.append(bool(row["is_eu_restricted"]))
+            sin.append(bool(row["is_sin_list"]))
+
+        self.names = names
+        pct.append(np.nan)
+        for column in (banned, restricted, sin):
+            column.append(False)
+        self.natural_origin_pct = np.array(pct, dtype=np.float64)
+        self.is_eu_banned = np.array(banned, dtype=bool)
+        self.is_eu_restricted = np.array(restricted, dtype=bool)
+        self.is_sin_list = np.array(sin, dtype=bool)
+
+    def __len__(self):
+        return len(self.names)
+
+    @functools.cached_property
+    def fuzzy(self) -> TrigramIndex:
+        # Dibangun saat pertama dipakai, bukan tiap reload
+        return TrigramIndex(self.names)
+
+    def position(self, name: str, fuzzy: bool = False) -> int:
+        """Row of `name`, or -1 (the sentinel) when it isn't known."""
+        i = self.index.get(normalize_inci(name), -1)
+        if i < 0 and fuzzy:
+            best = self.fuzzy.best(name, threshold=FUZZY_THRESHOLD)
+            if best is not None:
+                i = self.index[normalize_inci(best)]
+        return i
+
+    @classmethod
+    def load(cls) -> "IngredientTable":
+        # Pakai snapshot lokal kalau ada (refresh-nya lewat refresh()), selain itu baca dari DB
+        try:
+            rows = snapshot.iter_snapshot_rows("ingredient_master", COLUMNS)
+            return cls(list(rows))
+        except (FileNotFoundError, RuntimeError):
+            return cls(list(iter_rows("ingredient_master", COLUMNS, prefetch=True)))
+
+    def score(self, products: list[list[str]], details: bool = True, fuzzy: bool = False) -> list[dict]:
+        """Score every ingredient list of `products` in one vectorized pass.
+
+        With `fuzzy`, names without an exact match are matched to the closest
+        known INCI name instead of counting as unmatched.
+        """
+        counts = np.array([len(p) for p in products], dtype=np.int64)
+        owner = np.repeat(np.arange(len(products)), counts)
+        flat = [name for product in products for name in product]
+
+        idx = np.fromiter((self.position(name, fuzzy) for name in flat), dtype=np.int64, count=len(flat))
+        found = idx >= 0
+
+        pct = self.natural_origin_pct[idx]
+        banned = self.is_eu_banned[idx]
+        restricted = self.is_eu_restricted[idx]
+        sin = self.is_sin_list[idx]
+        known_pct = ~np.isnan(pct)
+
+        n = len(products)
+        matched = np.bincount(owner, weights=found, minlength=n)
+        pct_sum = np.bincount(owner, weights=np.where(known_pct, pct, 0), minlength=n)
+        pct_count = np.bincount(owner, weights=known_pct, minlength=n)
+        banned_count = np.bincount(owner, weights=banned, minlength=n)
+        restricted_count = np.bincount(owner, weights=restricted, minlength=n)
+        sin_count = np.bincount(owner, weights=sin, minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            natural_share = pct_sum / pct_count
+
+        results = []
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1])) if n else []
+        for i in range(n):
+            result = {
+                "ingredients": int(counts[i]),
+                "matched": int(matched[i]),
+                "natural_origin_share": None if np.isnan(natural_share[i]) else round(float(natural_share[i]), 2),
+                "banned_count": int(banned_count[i]),
+                "restricted_count": int(restricted_count[i]),
+                "sin_hits": int(sin_count[i]),
+            }
+            if details:
+                result["details"] = [
+                    {
+                        "inci": flat[j],
+                        "matched": bool(found[j]),
+                        "inci_name": self.names[idx[j]] if found[j] else None,
+                        "natural_origin_pct": None if np.isnan(pct[j]) else float(pct[j]),
+                        "is_eu_banned": bool(banned[j]),
+                        "is_eu_restricted": bool(restricted[j]),
+                        "is_sin_list": bool(sin[j]),
+                    }
+                    for j in range(starts[i], starts[i] + counts[i])
+                ]
+            results.append(result)
+        return results
+
+_table: IngredientTable | None = None
+_lock = threading.Lock()
+# Diisi refresh_loop(); invalidate() dipanggil dari thread lain
+_loop: asyncio.AbstractEventLoop | None = None
+_wake: asyncio.Event | None = None
+
+def get_table() -> IngredientTable:
+    """The current table; loaded here only if no refresh has built one yet."""
+    global _table
+    with _lock:
+        if _table is None:
+            _table = IngredientTable.load()
+        return _table
+
+def refresh():
+    """Bring the snapshot up to date and swap in a table built from it.
+
+    Requests keep using the old table until the new one is ready, so this
+    belongs in the background (refresh_loop), not in the request path.
+    """
+    global _table
+    if os.path.exists(snapshot.snapshot_path("ingredient_master")):
+        try:
+            snapshot.refresh_table("ingredient_master")
+        except RuntimeError:
+            # pyarrow gak ter-install: load() baca dari DB
+            pass
+    table = IngredientTable.load()
+    with _lock:
+        _table = table
+
+async def refresh_loop():
+    """Run refresh() now, then every REFRESH_INTERVAL or sooner after invalidate()."""
+    global _loop, _wake
+    _loop, _wake = asyncio.get_running_loop(), asyncio.Event()
+    while True:
+        _wake.clear()
+        try:
+            await asyncio.to_thread(refresh)
+        except Exception as e:
+            # Tabel lama tetap dipakai sampai refresh berikutnya
+            print(f"Scoring table refresh failed: {e}")
+        try:
+            await asyncio.wait_for(_wake.wait(), REFRESH_INTERVAL)
+        except TimeoutError:
+            pass
+
+def invalidate():
+    """Refresh the table in the background as soon as possible."""
+    if _wake is not None:
+        _loop.call_soon_threadsafe(_wake.set)
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import sys
+from scrapers.browser_pool import browser_pool
+from scrapers.metrics import metrics
+from scrapers.pipeline import PIPELINE_DIR, Pipeline, Stage, read_json, write_json
+
+# Stage modul di-import di dalam fungsi: `run --dry-run` gak perlu playwright/pdfplumber
+
+COSING_PDF = "files/COSING_PROHIBITED_ANNEX_2.pdf"
+COSING_CSV = "files/cosing_prohibited_output.csv"
+SIN_CSV = "files/sin_list_output.csv"
+MERGED_CSV = "files/merged_cosing_sin_output.csv"
+COSMOS_CERTIFIED_JSON = f"{PIPELINE_DIR}/cosmos_certified.json"
+COSMOS_APPROVED_JSON = f"{PIPELINE_DIR}/cosmos_approved.json"
+
+def cosing_prohibited():
+    from scrapers import cosing_prohibited_list
+    cosing_prohibited_list.main()
+
+async def chemsec_sin():
+    from scrapers import chemsec_sin_list
+    results = await chemsec_sin_list.scrape_sin_list()
+    if not results:
+        raise RuntimeError("SIN List scrape returned no rows")
+    await chemsec_sin_list.save_to_csv(results, SIN_CSV)
+
+def combine_cosing_sin():
+    from scrapers import combine_cosing_sin
+    combine_cosing_sin.merge([COSING_CSV, SIN_CSV], MERGED_CSV, combine_cosing_sin.POLICIES)
+
+async def cosmos_certified_scrape():
+    from scrapers import cosmos_certified
+    write_json(COSMOS_CERTIFIED_JSON, await cosmos_certified.scrape_cosmos_certified())
+
+def cosmos_certified_upload():
+    from scrapers import cosmos_certified
+    data = read_json(COSMOS_CERTIFIED_JSON)
+    if data:
+        print("Done: ", cosmos_certified.upload(data), "rows upserted")
+
+async def cosmos_approved_scrape():
+    from scrapers import cosmos_approved
+    write_json(COSMOS_APPROVED_JSON, await cosmos_approved.scrape_cosmos_certified())
+
+def cosmos_approved_upload():
+    from scrapers import cosmos_approved
+    data = read_json(COSMOS_APPROVED_JSON)
+    if data:
+        print("Done: ", cosmos_approved.upload(data), "rows upserted")
+
+def split_inci():
+    from scrapers import clean_duplicates
+    clean_duplicates.split_inci_in_db()
+
+def dedupe_ingredients():
+    from scrapers.batch import invalidate_api_cache
+    from scrapers.clean_duplicates import clean_duplicates
+    clean_duplicates()
+    invalidate_api_cache()
+
+STAGES = [
+    Stage("cosing_prohibited", cosing_prohibited, inputs=(COSING_PDF,), outputs=(COSING_CSV,)),
+    Stage("chemsec_sin", chemsec_sin, outputs=(SIN_CSV,), remote=True),
+    Stage("combine_cosing_sin", combine_cosing_sin, outputs=(MERGED_CSV,), after=("cosing_prohibited", "chemsec_sin")),
+    Stage("cosmos_certified", cosmos_certified_scrape, outputs=(COSMOS_CERTIFIED_JSON,), remote=True),
+    Stage("cosmos_certified_upload", cosmos_certified_upload, after=("cosmos_certified",)),
+    Stage("cosmos_approved", cosmos_approved_scrape, outputs=(COSMOS_APPROVED_JSON,), remote=True),
+    Stage("cosmos_approved_upload", cosmos_approved_upload, after=("cosmos_approved",)),
+    # Split dan dedup jalan setelah semua upload ke ingredient_master
+    Stage("split_inci", split_inci, after=("cosmos_certified_upload", "cosmos_approved_upload")),
+    Stage("clean_duplicates", dedupe_ingredients, after=("split_inci",)),
+]
+
+async def run_pipeline(pipeline: Pipeline, targets: list[str], force: set[str], offline: bool) -> dict[str, str]:
+    # Pool dipegang selama run: semua stage scrape pakai satu browser yang sudah hangat
+    async with browser_pool():
+        return await pipeline.run(targets, force, offline)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m scrapers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the ingredient refresh, skipping stages whose inputs didn't change")
+    run.add_argument("stages", nargs="*", help="only these stages (and what they depend on); default: all")
+    run.add_argument("--force", action="append", default=[], metavar="STAGE", help="run STAGE even if it is up to date")
+    run.add_argument("--force-all", action="store_true", help="run every selected stage")
+    run.add_argument("--offline", action="store_true", help="don't re-scrape websites, reuse their last output")
+    run.add_argument("--dry-run", action="store_true", help="only print which stages would run")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(STAGES)
+    unknown = [name for name in args.stages + args.force if name not in pipeline.stages]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}; choose from {', '.join(pipeline.order)}")
+    force = set(pipeline.stages) if args.force_all else set(args.force)
+
+    if args.dry_run:
+        for name, action in pipeline.plan(args.stages, force, args.offline).items():
+            print(f"{action:7} {name}")
+        return
+
+    with metrics.run("pipeline"):
+        results = asyncio.run(run_pipeline(pipeline, args.stages, force, args.offline))
+    print("\nSummary:")
+    for name, result in results.items():
+        print(f"  {result:8} {name}")
+    if any(result in ("failed", "blocked") for result in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import json
+import os
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+from database import supabase
+from scrapers.metrics import count, span
+
+CHUNK_SIZE = 500
+PAGE_SIZE = 1000
+# id masuk ke query string, jaga URL tetap di bawah limit gateway
+DELETE_CHUNK_SIZE = 300
+
+def chunked(lst, size):
+    for i in range(0, len(lst), size):
+        yield lst[i:i+size]
+
+def _sent(op: str, table: str, chunk: list):
+    count("db_rows", len(chunk), op=op, table=table)
+    count("db_bytes", len(json.dumps(chunk, default=str)), op=op, table=table)
+
+def iter_rows(
+    table: str,
+    columns: str = "*",
+    page_size: int = PAGE_SIZE,
+    prefetch: bool = False,
+    where: Callable | None = None,
+) -> Iterator[dict]:
+    """Stream `table` in pages using keyset pagination on `id`.
+
+    Only `columns` are selected (`id` is added if missing). `where` gets the
+    query builder and returns it with extra filters. With `prefetch` the next
+    page is requested in a background thread while the current one is being
+    consumed.
+    """
+    if columns != "*" and "id" not in [c.strip() for c in columns.split(",")]:
+        columns = f"id, {columns}"
+
+    def fetch_page(after):
+        query = supabase.table(table).select(columns).order("id").limit(page_size)
+        if where:
+            query = where(query)
+        if after is not None:
+            query = query.gt("id", after)
+        with span("db", op="select", table=table):
+            data = query.execute().data
+        count("db_rows", len(data), op="select", table=table)
+        return data
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        page = fetch_page(None)
+        while page:
+            last_page = len(page) < page_size
+            future = pool.submit(fetch_page, page[-1]["id"]) if prefetch and not last_page else None
+            yield from page
+            if last_page:
+                break
+            page = future.result() if future else fetch_page(page[-1]["id"])
+
+def fetch_rows(table: str, columns: str = "*") -> list[dict]:
+    return list(iter_rows(table, columns))
+
+def fetch_map(table: str, key: str = "name", value: str = "id") -> dict:
+    """Fetch every `key` → `value` pair of `table`."""
+    result = {}
+    for row in fetch_rows(table, f"{key}, {value}"):
+        result.setdefault(row[key], row[value])
+    return result
+
+def insert_chunks(table: str, rows: list[dict], size: int = CHUNK_SIZE) -> list[dict]:
+    """Insert `rows` in chunks and return the inserted rows.
+
+    A failing chunk is reported and skipped so the remaining chunks still go in.
+    """
+    inserted = []
+    for chunk in chunked(rows, size):
+        try:
+            with span("db", op="insert", table=table):
+                res = supabase.table(table).insert(chunk).execute()
+            _sent("insert", table, chunk)
+            inserted.extend(res.data)
+        except Exception as e:
+            count("db_errors", op="insert", table=table)
+            print(f"  Error inserting {len(chunk)} rows into {table}: {e}")
+    return inserted
+
+def upsert_chunks(
+    table: str,
+    rows: list[dict],
+    on_conflict: str,
+    size: int = CHUNK_SIZE,
+    on_written: Callable[[list[dict]], None] | None = None,
+) -> int:
+    """Upsert `rows` in chunks and return how many rows were written.
+
+    `on_written` is called with every chunk that went in.
+    """
+    written = 0
+    for chunk in chunked(rows, size):
+        try:
+            with span("db", op="upsert", table=table):
+                supabase.table(table).upsert(chunk, on_conflict=on_conflict).execute()
+            _sent("upsert", table, chunk)
+            written += len(chunk)
+            if on_written:
+                on_written(chunk)
+        except Exception as e:
+            count("db_errors", op="upsert", table=table)
+            print(f"  Error upserting {len(chunk)} rows into {table}: {e}")
+    return written
+
+def delete_chunks(table: str, ids: list, size: int = DELETE_CHUNK_SIZE) -> int:
+    """Delete rows by id in chunks and return how many ids were sent."""
+    deleted = 0
+    for chunk in chunked(ids, size):
+        try:
+            with span("db", op="delete", table=table):
+                supabase.table(table).delete().in_("id", chunk).execute()
+            _sent("delete", table, chunk)
+            deleted += len(chunk)
+        except Exception as e:
+            count("db_errors", op="delete", table=table)
+            print(f"  Error deleting {len(chunk)} rows from {table}: {e}")
+    return deleted
+
+def invalidate_api_cache(names: list[str] | None = None):
+    """Tell the API to drop cached ingredients after a sync (all of them by default).
+
+    Skipped when API_URL isn't set, e.g. for local runs without the API.
+    """
+    api_url = os.getenv("API_URL")
+    if not api_url:
+        return
+    try:
+        res = httpx.post(
+            f"{api_url.rstrip('/')}/ingredients/cache/invalidate",
+            json=names,
+            headers={"X-Cache-Token": os.getenv("CACHE_INVALIDATE_TOKEN", "")},
+            timeout=10,
+        )
+        res.raise_for_status()
+        print(f"API cache invalidated: {res.json()['invalidated']} entries")
+    except httpx.HTTPError as e:
+        print(f"Could not invalidate API cache: {e}")
@@ -1,7 +1,11 @@
+import argparse
 import asyncio
 import csv
-from playwright.async_api import async_playwright
-from database import supabase
+import re
+from scrapers.browser_pool import browser_pool
+from scrapers.metrics import count, metrics, span
+from scrapers.sync_state import sync_rows
+from scrapers.throttle import host_controller
 
 BASE_URL = (
     "https://www.bcorporation.net/en-us/find-a-b-corp/"
@@ -10,17 +14,20 @@ BASE_URL = (
     "&page={page}"
 )
 
+CONCURRENCY = 8
+GOTO_TIMEOUT = 30000
+SELECTOR_TIMEOUT = 15000
+# Batas total per profil (detik), termasuk goto dan semua locator
+PROFILE_TIMEOUT = 60
+
 async def scrape():
     links = []
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-
+    async with browser_pool() as pool, pool.page() as page:
         for page_num in range(1, 4):
             url = BASE_URL.format(page=page_num)
             print(f"Scraping page {page_num}...")
-            await page.goto(url)
+            await host_controller(url).request(lambda: page.goto(url))
             await page.wait_for_selector("li.ais-Hits-item", timeout=15000)
 
             cards = await page.query_selector_all("li.ais-Hits-item a[data-testid='profile-link']")
@@ -32,8 +39,6 @@ async def scrape():
 
             print(f"  Found {len(cards)} cards")
 
-        await browser.close()
-
     with open("files/bcorp_links.csv", "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["link"])
@@ -42,65 +47,131 @@ async def scrape():
 
     print(f"Done. Total {len(links)} links saved to bcorp_links.csv")
 
-async def scrape_brand_profile(page, url: str) -> dict | None:
+async def extract_profile(page) -> dict:
+    # Name
+    name = await page.locator("main h1").first.inner_text()
+    name = name.strip()
+
+    # Country
+    country = None
+    try:
+        p_text = await page.locator("div:has(> span:text('Headquarters')) .opacity-60 p").first.inner_text()
+        # inner_text() akan return sesuatu seperti "Uusimaa ,  Finland"
+        # ambil bagian setelah koma terakhir
+        parts = p_text.split(",")
+        if len(parts) >= 2:
+            country = parts[-1].strip()
+    except Exception:
+        pass
+
+    # B Corp Score
+    b_corp_score_raw = None
     try:
-        await page.goto(url, timeout=30000)
-        await page.wait_for_selector("main h1", timeout=15000)
-
-        # Name
-        name = await page.locator("main h1").first.inner_text()
-        name = name.strip()
-
-        # Country
-        country = None
-        try:
-            p_text = await page.locator("div:has(> span:text('Headquarters')) .opacity-60 p").first.inner_text()
-            # inner_text() akan return sesuatu seperti "Uusimaa ,  Finland"
-            # ambil bagian setelah koma terakhir
-            parts = p_text.split(",")
-            if len(parts) >= 2:
-                country = parts[-1].strip()
-        except Exception:
-            pass
-
-        # B Corp Score
-        b_corp_score_raw = None
-        try:
-            spans = await page.locator("span:has-text('Overall B Impact Score')").all()
-            for span in spans:
-                text = await span.inner_text()
-                match = re.search(r"[\d.]+", text)
-                if match:
-                    b_corp_score_raw = float(match.group())
+        score_spans = await page.locator("span:has-text('Overall B Impact Score')").all()
+        for score_span in score_spans:
+            text = await score_span.inner_text()
+            match = re.search(r"[\d.]+", text)
+            if match:
+                b_corp_score_raw = float(match.group())
+                break
+    except Exception:
+        pass
+
+    # Calculate eco_score
+    b_corp_score = None
+    if b_corp_score_raw is not None:
+        eco_score = 75 + ((b_corp_score_raw - 80) / (150 - 80)) * 40
+        b_corp_score = min(round(eco_score, 2), 100)
+
+    return {
+        "name": name,
+        "country": country,
+        "has_takeback_program": False,
+        "has_carbon_commitment": False,
+        "has_csr_program": False,
+        "b_corp_score": b_corp_score,
+        "free_animal_testing": True,
+        "bad_news_score": 0,
+        "bad_news_last_checked": None,
+    }
+
+async def scrape_brand_profile(page, url: str) -> dict:
+    """Brand on the profile at `url`; errors are raised so the pool drops the page."""
+    with span("goto"):
+        response = await host_controller(url).request(lambda: page.goto(url, timeout=GOTO_TIMEOUT))
+    if response is not None:
+        sizes = await response.request.sizes()
+        count("bytes", sizes["responseBodySize"] + sizes["responseHeadersSize"], via="browser")
+    with span("wait_for_selector"):
+        await page.wait_for_selector("main h1", timeout=SELECTOR_TIMEOUT)
+    with span("extract"):
+        return await extract_profile(page)
+
+
+async def scrape_profiles(links: list[str], concurrency: int = CONCURRENCY) -> tuple[list[dict], list[str]]:
+    """Scrape `links` with `concurrency` pages from the browser pool in parallel.
+
+    Returns the brands in the order of `links` and the URLs that failed or
+    ran past PROFILE_TIMEOUT.
+    """
+    queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+    for i, url in enumerate(links):
+        queue.put_nowait((i, url))
+
+    results: dict[int, dict] = {}
+    failed: list[str] = []
+
+    async with browser_pool() as pool:
+
+        async def worker():
+            while True:
+                try:
+                    i, url = queue.get_nowait()
+                except asyncio.QueueEmpty:
                     break
-        except Exception:
-            pass
-
-        # Calculate eco_score
-        b_corp_score = None
-        if b_corp_score_raw is not None:
-            eco_score = 75 + ((b_corp_score_raw - 80) / (150 - 80)) * 40
-            b_corp_score = min(round(eco_score, 2), 100)
-
-        return {
-            "name": name,
-            "country": country,
-            "has_takeback_program": False,
-            "has_carbon_commitment": False,
-            "has_csr_program": False,
-            "b_corp_score": b_corp_score,
-            "free_animal_testing": True,
-            "bad_news_score": 0,
-            "bad_news_last_checked": None,
-        }
-    except Exception as e:
-        print(f"  Error scraping {url}: {e}")
-        return None
-
-
-async def scrape_all_brands():
-    import re
 
+                print(f"[{i+1}/{len(links)}] Scraping {url}...")
+                try:
+                    # Error dan timeout keluar dari blok page(), jadi context yang nyangkut dibuang pool
+                    with span("profile"):
+                        async with pool.page() as page:
+                            brand = await asyncio.wait_for(scrape_brand_profile(page, url), PROFILE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    print(f"  Timeout scraping {url}")
+                    brand = None
+                except Exception as e:
+                    print(f"  Error scraping {url}: {e}")
+                    brand = None
+
+                if brand:
+                    results[i] = brand
+                    count("rows")
+                else:
+                    count("failed_profiles")
+                    failed.append(url)
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(links)))))
+
+    return [results[i] for i in sorted(results)], failed
+
+def upsert_brands(brands: list[dict], dry_run: bool = False) -> dict[str, int]:
+    """Upsert the brands that changed since the last sync, on name.
+
+    The diff runs against the local sync state (seeded from the brands table
+    on the first run), so unchanged brands are neither sent nor re-read.
+    With `dry_run` only the counts are computed.
+    """
+    # Nama dobel di links: ambil hasil scrape terakhir
+    by_name = {brand["name"]: brand for brand in brands}
+    diff = sync_rows("bcorp_brands", "brands", list(by_name.values()), key="name", dry_run=dry_run)
+    return {
+        "inserted": len(diff.inserted),
+        "updated": len(diff.modified),
+        "unchanged": diff.unchanged,
+        "removed": len(diff.removed),
+    }
+
+async def scrape_all_brands(dry_run: bool = False):
     # Load links from CSV
     links = []
     with open("files/bcorp_links.csv", newline="", encoding="utf-8") as f:
@@ -110,51 +181,31 @@ async def scrape_all_brands():
 
     print(f"Loaded {len(links)} links")
 
-    results = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-
-        for i, url in enumerate(links):
-            print(f"[{i+1}/{len(links)}] Scraping {url}...")
-            brand = await scrape_brand_profile(page, url)
-            if brand:
-                results.append(brand)
-
-        await browser.close()
+    results, failed = await scrape_profiles(links)
 
     print(f"\nScraped {len(results)} brands")
+    if failed:
+        print(f"Failed {len(failed)} profiles:")
+        for url in failed:
+            print(f"  {url}")
     print("\nSample (3):")
     for b in results[:3]:
         print(b)
 
-    proceed = input("\nProceed to insert to DB? (y/n): ")
-    if proceed.lower() != "y":
-        print("Aborted.")
-        return
-
-    print("Inserting to DB...")
-    for brand in results:
-        try:
-            existing = supabase.table("brands").select("id").eq("name", brand["name"]).execute()
-            if existing.data:
-                supabase.table("brands").update(brand).eq("name", brand["name"]).execute()
-                print(f"  Updated: {brand['name']}")
-            else:
-                supabase.table("brands").insert(brand).execute()
-                print(f"  Inserted: {brand['name']}")
-        except Exception as e:
-            print(f"  Error inserting {brand['name']}: {e}")
-
-    print("Done!")
+    counts = await asyncio.to_thread(upsert_brands, results, dry_run)
+    print(f"Inserted: {counts['inserted']}, updated: {counts['updated']}, unchanged: {counts['unchanged']}, "
+          f"missing from this scrape: {counts['removed']}")
+    print("Dry run, nothing written." if dry_run else "Done!")
 
 
 if __name__ == "__main__":
-    import re
-    asyncio.run(scrape_all_brands())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="scrape and diff without writing to the DB")
+    args = parser.parse_args()
+    with metrics.run("bcorp"):
+        asyncio.run(scrape_all_brands(dry_run=args.dry_run))
 
 # if __name__ == "__main__":
-#     import re
 #     async def test():
 #         async with async_playwright() as p:
 #             browser = await p.chromium.launch(headless=False)
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator
+from scrapers.metrics import count, span
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page, Playwright, Route
+
+# BROWSER_HEADLESS=0 buat lihat prosesnya waktu debugging
+HEADLESS = os.getenv("BROWSER_HEADLESS", "1") != "0"
+# Context diganti baru setelah sekian navigasi, atau kalau heap JS page-nya lewat batas (MB)
+MAX_NAVIGATIONS = int(os.getenv("BROWSER_MAX_NAVIGATIONS", "100"))
+MAX_HEAP_MB = int(os.getenv("BROWSER_MAX_HEAP_MB", "256"))
+VIEWPORT = {"width": 1280, "height": 800}
+
+# Scraper cuma butuh document, script dan xhr; sisanya gak ngaruh ke data
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "texttrack", "manifest", "eventsource"})
+
+# performance.memory cuma ada di Chromium
+HEAP_SCRIPT = "() => performance.memory ? performance.memory.usedJSHeapSize : 0"
+
+class BrowserLaunchError(RuntimeError):
+    """Chromium couldn't be started; every borrow from the pool will fail."""
+
+@dataclass(eq=False)
+class _Slot:
+    context: "BrowserContext"
+    page: "Page"
+    navigations: int = 0
+
+class BrowserPool:
+    """One Chromium shared by every scraper, handing out pages on their own contexts.
+
+    Borrow a page with `async with pool.page() as page:`. When the block
+    exits the page goes back to the pool and is reused by the next borrower,
+    unless its context has seen `max_navigations` main-frame navigations or
+    the page's JS heap is over `max_heap_mb`; then the context is closed and
+    a fresh one is opened on demand. A block that raises also discards its
+    context, since the page may be stuck mid-navigation.
+
+    Every context gets `viewport` and aborts requests for `blocked` resource
+    types. The browser is launched on the first borrow (and relaunched if it
+    crashed), so holding a pool open costs nothing until a scraper needs it.
+    """
+
+    def __init__(
+        self,
+        headless: bool = HEADLESS,
+        max_navigations: int = MAX_NAVIGATIONS,
+        max_heap_mb: int = MAX_HEAP_MB,
+        viewport: dict | None = VIEWPORT,
+        blocked: frozenset[str] = BLOCKED_RESOURCE_TYPES,
+    ):
+        self.headless = headless
+        self.max_navigations = max_navigations
+        self.max_heap_mb = max_heap_mb
+        self.viewport = viewport
+        self.blocked = blocked
+        self.playwright: "Playwright | None" = None
+        self.browser: "Browser | None" = None
+        self.idle: list[_Slot] = []
+        self.busy: set[_Slot] = set()
+        self.lock = asyncio.Lock()
+        self.closed = False
+        self.launch_error: BrowserLaunchError | None = None
+        # Jumlah pemakai browser_pool() yang masih memegang pool ini
+        self.users = 0
+
+    async def __aenter__(self) -> "BrowserPool":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self) -> "Browser":
+        """The pool's browser, launched on first call."""
+        async with self.lock:
+            if self.closed:
+                raise RuntimeError("browser pool is closed")
+            # Gagal launch (mis. Chromium belum di-install) gak dicoba ulang tiap page
+            if self.launch_error is not None:
+                raise self.launch_error
+            if self.browser is None or not self.browser.is_connected():
+                # Import di sini: `python -m scrapers run --dry-run` gak butuh playwright
+                from playwright.async_api import async_playwright
+
+                try:
+                    with span("browser_launch"):
+                        if self.playwright is None:
+                            self.playwright = await async_playwright().start()
+                        self.browser = await self.playwright.chromium.launch(headless=self.headless)
+                except Exception as e:
+                    self.launch_error = BrowserLaunchError(str(e).splitlines()[0] if str(e) else repr(e))
+                    raise self.launch_error from e
+                count("browser_launches")
+                # Context dari browser lama (crash) sudah mati
+                self.idle.clear()
+        return self.browser
+
+    async def _block(self, route: "Route"):
+        if route.request.resource_type in self.blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _open(self) -> _Slot:
+        browser = await self.start()
+        with span("new_context"):
+            context = await browser.new_context(viewport=self.viewport)
+            if self.blocked:
+                await context.route("**/*", self._block)
+            page = await context.new_page()
+        slot = _Slot(context, page)
+
+        def navigated(frame):
+            if frame.parent_frame is None:
+                slot.navigations += 1
+
+        page.on("framenavigated", navigated)
+        count("browser_contexts")
+        return slot
+
+    async def _take(self) -> _Slot:
+        while self.idle:
+            slot = self.idle.pop()
+            if not slot.page.is_closed():
+                return slot
+        return await self._open()
+
+    async def _recycle_reason(self, slot: _Slot) -> str | None:
+        if slot.navigations >= self.max_navigations:
+            return "navigations"
+        if self.max_heap_mb:
+            try:
+                heap = await slot.page.evaluate(HEAP_SCRIPT)
+            except Exception:
+                return "error"
+            if heap > self.max_heap_mb * 1024 * 1024:
+                return "memory"
+        return None
+
+    async def _discard(self, slot: _Slot, reason: str):
+        count("context_recycles", reason=reason)
+        try:
+            await slot.context.close()
+        except Exception:
+            # Browser-nya bisa sudah mati duluan
+            pass
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator["Page"]:
+        """Borrow a page until the block exits.
+
+        The page keeps its context's cookies and storage between borrows, so
+        don't count on a fresh session.
+        """
+        slot = await self._take()
+        self.busy.add(slot)
+        ok = False
+        try:
+            yield slot.page
+            ok = True
+        finally:
+            self.busy.discard(slot)
+            if self.closed or slot.page.is_closed():
+                await self._discard(slot, "closed")
+            elif not ok:
+                await self._discard(slot, "error")
+            elif reason := await self._recycle_reason(slot):
+                await self._discard(slot, reason)
+            else:
+                self.idle.append(slot)
+
+    async def close(self):
+        """Close every context, the browser and Playwright; safe to call twice."""
+        self.closed = True
+        slots = [*self.idle, *self.busy]
+        self.idle.clear()
+        self.busy.clear()
+        await asyncio.gather(*(slot.context.close() for slot in slots), return_exceptions=True)
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+# Satu pool per event loop, seperti client async di database.py
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BrowserPool]" = weakref.WeakKeyDictionary()
+
+@asynccontextmanager
+async def browser_pool() -> AsyncIterator[BrowserPool]:
+    """The running loop's shared pool, closed when its last user exits.
+
+    Scrapers wrap their browser work in `async with browser_pool() as pool`.
+    When an outer caller (e.g. the pipeline) holds the pool open, they all
+    borrow from the same warm browser instead of launching their own.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None or pool.closed:
+        pool = _pools[loop] = BrowserPool()
+    pool.users += 1
+    try:
+        yield pool
+    finally:
+        pool.users -= 1
+        if pool.users == 0:
+            if _pools.get(loop) is pool:
+                del _pools[loop]
+            await pool.close()
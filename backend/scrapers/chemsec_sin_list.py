@@ -1,13 +1,20 @@
 import asyncio
-import httpx
-from playwright.async_api import async_playwright
-from database import supabase
+from scrapers.browser_pool import browser_pool
+from scrapers.tables import Column, extract_table, split_list
+from scrapers.pubchem import CasResolver
+from scrapers.batch import invalidate_api_cache, upsert_chunks
+from scrapers.inci import REVIEW_THRESHOLD, InciIndex, clean_inci
+from scrapers.metrics import count, metrics, span
+from scrapers.throttle import host_controller
 import os
 import csv
 
-def chunked(lst, size):
-    for i in range(0, len(lst), size):
-        yield lst[i:i+size]
+SIN_URL = "https://sinsearch.chemsec.org/"
+
+SIN_COLUMNS = [
+    Column("cas", 1),
+    Column("sin_list_flags", 3, split_list),
+]
 
 # async def cas_to_inci(cas: str) -> str | None:
 #     """Convert CAS number to INCI name via PubChem API."""
@@ -20,25 +27,6 @@ def chunked(lst, size):
 #         except Exception:
 #             return None
 
-async def cas_to_inci(cas: str) -> str | None:
-    url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{cas}/synonyms/JSON"
-    async with httpx.AsyncClient(timeout=10) as client:
-        try:
-            res = await client.get(url)
-            data = res.json()
-            synonyms = data["InformationList"]["Information"][0]["Synonym"]
-            
-            # INCI names biasanya all-caps dan tidak mengandung karakter aneh
-            for syn in synonyms:
-                if syn.isupper() and len(syn) > 2 and not syn.startswith("DTXSID") and not syn.startswith("CHEBI"):
-                    return syn
-            
-            # Fallback: return synonym pertama
-            return synonyms[0]
-        except Exception:
-            return None
-        
-
 async def save_to_csv(results: list[dict], filename: str = "sin_list_output.csv"):
     with open(filename, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=[
@@ -70,11 +58,9 @@ async def save_to_csv(results: list[dict], filename: str = "sin_list_output.csv"
     print(f"Saved to {filename}")
 
 async def scrape_sin_list():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)  # headless=False biar bisa liat prosesnya
-        page = await browser.new_page()
-
-        await page.goto("https://sinsearch.chemsec.org/")
+    # BROWSER_HEADLESS=0 biar bisa liat prosesnya
+    async with browser_pool() as pool, pool.page() as page:
+        await host_controller(SIN_URL).request(lambda: page.goto(SIN_URL))
         # Klik tombol Sign in di navbar
         await page.click("text=Sign in")
         await page.wait_for_selector("input[type='email']")
@@ -124,26 +110,16 @@ async def scrape_sin_list():
 
         # Loop through all pages
         while True:
-            await page.wait_for_selector("table tbody tr", timeout=20000)
-            rows = await page.query_selector_all("table tbody tr")
-            print(f"Found {len(rows)} rows on current page")
-
-            for row in rows:
-                cols = await row.query_selector_all("td")
-                if len(cols) < 2:
-                    continue
-
-                cas_number = (await cols[1].inner_text()).strip()
-                health_concerns_raw = (await cols[3].inner_text()).strip()
-                health_concerns = [h.strip() for h in health_concerns_raw.split(",") if h.strip()]
+            with span("wait_for_selector"):
+                await page.wait_for_selector("table tbody tr", timeout=20000)
+            with span("extract"):
+                table = await extract_table(page, SIN_COLUMNS)
+            print(f"Found {len(table.records)} rows on current page")
 
-                if not cas_number:
-                    continue
-
-                all_results.append({
-                    "cas": cas_number,
-                    "sin_list_flags": health_concerns
-                })
+            rows = [r for r in table.records if r["cas"]]
+            count("pages")
+            count("rows", len(rows))
+            all_results.extend(rows)
 
             # Cek apakah ada next page
             next_btn = await page.query_selector("li.paginationjs-next:not(.disabled)")
@@ -151,48 +127,84 @@ async def scrape_sin_list():
                 print("No more pages")
                 break
 
-            await next_btn.click()
-            await page.wait_for_load_state("networkidle")
-            await page.wait_for_timeout(1000)
+            with span("next_page"):
+                await next_btn.click()
+                await page.wait_for_load_state("networkidle")
+                await page.wait_for_timeout(1000)
 
-        await browser.close()
         return all_results
 
 async def update_ingredient_master(results: list[dict]):
     print(f"Processing {len(results)} entries...")
 
+    # Convert CAS ke INCI, semua sekaligus
+    async with CasResolver() as resolver:
+        inci_names = await resolver.resolve_many([entry["cas"] for entry in results])
+        failed = set(resolver.failed)
+
+    resolved = []
     for entry in results:
         cas = entry["cas"]
-        flags = entry["sin_list_flags"]
-
-        # Convert CAS ke INCI
-        inci_name = await cas_to_inci(cas)
+        inci_name = inci_names[cas]
+        if cas in failed:
+            # Lookup-nya gagal (bukan gak ketemu): gak di-cache, run berikutnya dicoba lagi
+            print(f"PubChem lookup failed for CAS {cas}, skipping this run")
+            continue
         if not inci_name:
             print(f"Could not convert CAS {cas} to INCI, skipping")
             continue
-
-        print(f"CAS {cas} → {inci_name}")
-
-        # Cek apakah sudah ada di DB
-        existing = supabase.table("ingredient_master").select("id").eq("inci_name", inci_name).execute()
-
-        if existing.data:
-            # Update existing
-            supabase.table("ingredient_master").update({
+        resolved.append((inci_name, entry["sin_list_flags"]))
+
+    await asyncio.to_thread(sync_sin_entries, resolved)
+
+def sync_sin_entries(resolved: list[tuple[str, list[str]]]):
+    """Write resolved (inci_name, flags) pairs to ingredient_master with chunked upserts.
+
+    Names are matched against the INCI index, so PubChem spellings of an
+    existing ingredient update that row; near-identical spellings are only
+    reported for review (see InciIndex). Existing rows only get is_sin_list and
+    sin_list_flags in their payload, so the upsert leaves their other columns
+    alone; new rows get the full defaults.
+    """
+    index = InciIndex.load(review_threshold=REVIEW_THRESHOLD)
+
+    # INCI sama bisa datang dari beberapa CAS: gabung flags-nya
+    flags_by_inci: dict[str, list[str]] = {}
+    existing = set()
+    for inci_name, entry_flags in resolved:
+        entry = index.match(inci_name)
+        # Hanya baris yang sudah ada di DB (punya id) yang di-update
+        if entry and entry[0] is not None:
+            existing.add(entry[1])
+        inci_name = entry[1] if entry else clean_inci(inci_name)
+        index.add(inci_name)
+        flags = flags_by_inci.setdefault(inci_name, [])
+        flags.extend(f for f in entry_flags if f not in flags)
+
+    to_update = []
+    to_insert = []
+    for inci_name, flags in flags_by_inci.items():
+        if inci_name in existing:
+            to_update.append({
+                "inci_name": inci_name,
                 "is_sin_list": True,
                 "sin_list_flags": flags
-            }).eq("inci_name", inci_name).execute()
-            print(f"  Updated: {inci_name}")
+            })
         else:
-            # Insert baru
-            supabase.table("ingredient_master").insert({
+            to_insert.append({
                 "inci_name": inci_name,
                 "natural_origin_pct": 15,
                 "is_sin_list": True,
                 "sin_list_flags": flags,
                 "data_source": "ChemSec SIN List"
-            }).execute()
-            print(f"  Inserted: {inci_name}")
+            })
+
+    index.report_candidates("chemsec_sin")
+    print(f"To update: {len(to_update)}, to insert: {len(to_insert)}")
+    updated = upsert_chunks("ingredient_master", to_update, on_conflict="inci_name")
+    inserted = upsert_chunks("ingredient_master", to_insert, on_conflict="inci_name")
+    print(f"  Updated: {updated}, inserted: {inserted}")
+    invalidate_api_cache()
 
 async def main():
     print("Scraping SIN List...")
@@ -208,4 +220,5 @@ async def main():
         #     print("Done!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    with metrics.run("chemsec_sin"):
+        asyncio.run(main())
\ No newline at end of file
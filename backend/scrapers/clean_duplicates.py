@@ -1,38 +1,54 @@
-import asyncio
-from database import supabase
-import re
-
-def fetch_all(table):
-    all_rows = []
-    limit = 1000
-    offset = 0
-    while True:
-        res = supabase.table(table).select("*").range(offset, offset + limit - 1).execute()
-        all_rows.extend(res.data)
-        if len(res.data) < limit:
-            break
-        offset += limit
-    return all_rows
-
-def chunked(lst, size):
-    for i in range(0, len(lst), size):
-        yield lst[i:i+size]
-
-def get_separators(inci_name):
-    base = r'\s*\(and\)\s*|\s*\(And\)\s*|\s*,\s*|\s*\+\s*|\s*&\s*'
-    if inci_name.count('/') > 1:
-        base += r'|\s*/\s*'
-    return base
-
-def clean_duplicates():
-    # Ambil semua data
-    res = supabase.table("ingredient_master").select("id, inci_name, natural_origin_pct, restriction, data_source").execute()
-    rows = fetch_all("ingredient_master")
-
-    # Group by inci_name
+import argparse
+from scrapers.batch import delete_chunks, invalidate_api_cache, iter_rows, upsert_chunks
+from scrapers.inci import InciIndex, normalize_inci, split_mixture
+from scrapers import snapshot
+from scrapers.metrics import metrics, span
+
+COLUMNS = "id, inci_name, natural_origin_pct, restriction, data_source"
+
+def read_rows(from_snapshot: bool):
+    if from_snapshot:
+        return snapshot.iter_snapshot_rows("ingredient_master", COLUMNS)
+    return iter_rows("ingredient_master", COLUMNS, prefetch=True)
+
+def merge_group(entries: list[dict]) -> dict:
+    """Survivor of a duplicate group: first row, mean pct, union of restrictions."""
+    # Hitung mean natural_origin_pct
+    pcts = [e["natural_origin_pct"] for e in entries if e["natural_origin_pct"] is not None]
+    mean_pct = sum(pcts) / len(pcts) if pcts else None
+
+    # Union restriction
+    all_restrictions = set()
+    for e in entries:
+        restriction = e["restriction"]
+        if restriction:
+            # COSMOS menyimpan restriction sebagai string, hasil merge sebagai list
+            all_restrictions.update([restriction] if isinstance(restriction, str) else restriction)
+
+    keep = entries[0]
+    return {
+        "id": keep["id"],
+        # inci_name ikut dikirim: upsert tetap cek NOT NULL sebelum conflict
+        "inci_name": keep["inci_name"],
+        "natural_origin_pct": mean_pct,
+        "restriction": sorted(all_restrictions) if all_restrictions else None
+    }
+
+def print_diff(groups: dict[str, list[dict]], to_update: list[dict], limit: int = 10):
+    for item in to_update[:limit]:
+        entries = groups[normalize_inci(item["inci_name"])]
+        pcts = [e["natural_origin_pct"] for e in entries]
+        print(f"  {item['inci_name']}: keep {item['id']}, drop {len(entries) - 1}")
+        print(f"    natural_origin_pct {pcts} -> {item['natural_origin_pct']}")
+        print(f"    restriction -> {item['restriction']}")
+    if len(to_update) > limit:
+        print(f"  ... and {len(to_update) - limit} more groups")
+
+def clean_duplicates(dry_run: bool = False, from_snapshot: bool = False):
+    # Group by normalized inci_name, tabel di-stream per halaman
     groups = {}
-    for row in rows:
-        name = row["inci_name"]
+    for row in read_rows(from_snapshot):
+        name = normalize_inci(row["inci_name"])
         if name not in groups:
             groups[name] = []
         groups[name].append(row)
@@ -40,57 +56,41 @@ def clean_duplicates():
     to_delete = []
     to_update = []
 
-    for inci_name, entries in groups.items():
+    for entries in groups.values():
         if len(entries) == 1:
             continue
 
-        # Hitung mean natural_origin_pct
-        pcts = [e["natural_origin_pct"] for e in entries if e["natural_origin_pct"] is not None]
-        mean_pct = sum(pcts) / len(pcts) if pcts else None
-
-        # Union restriction
-        all_restrictions = set()
-        for e in entries:
-            if e["restriction"]:
-                all_restrictions.update(e["restriction"])
-
         # Keep id pertama, delete sisanya
-        keep = entries[0]
+        to_update.append(merge_group(entries))
         to_delete.extend([e["id"] for e in entries[1:]])
-        to_update.append({
-            "id": keep["id"],
-            "natural_origin_pct": mean_pct,
-            "restriction": list(all_restrictions) if all_restrictions else None
-        })
 
     print(f"Duplicates found: {len(to_update)} groups, {len(to_delete)} rows to delete")
 
+    if dry_run:
+        print_diff(groups, to_update)
+        print("Dry run, nothing written.")
+        return
+
     # Update rows yang di-keep
-    for item in to_update:
-        supabase.table("ingredient_master").update({
-            "natural_origin_pct": item["natural_origin_pct"],
-            "restriction": item["restriction"]
-        }).eq("id", item["id"]).execute()
+    updated = upsert_chunks("ingredient_master", to_update, on_conflict="id")
 
     # Delete duplicates
-    if to_delete:
-        for chunk in chunked(to_delete, 100):
-            supabase.table("ingredient_master").delete().in_("id", chunk).execute()
+    deleted = delete_chunks("ingredient_master", to_delete)
+    if from_snapshot:
+        snapshot.forget_rows("ingredient_master", to_delete)
 
-    print("Done!")
-    
-def split_inci_in_db():
-    res = supabase.table("ingredient_master").select("*").execute()
-    rows = fetch_all("ingredient_master")
+    print(f"Done! Updated {updated}, deleted {deleted}")
 
+def split_inci_in_db(dry_run: bool = False, from_snapshot: bool = False):
     to_delete = []
     to_insert = []
+    index = InciIndex()
 
-    for row in rows:
-        parts = re.split(get_separators(row["inci_name"]), row["inci_name"])
-        parts = [p.strip() for p in parts if p.strip()]
+    for row in read_rows(from_snapshot):
+        parts = split_mixture(row["inci_name"])
 
         if len(parts) <= 1:
+            index.add(row["inci_name"], row["id"])
             continue  # skip kalau gak ada split
 
         to_delete.append(row["id"])
@@ -104,22 +104,36 @@ def split_inci_in_db():
 
     print(f"Rows to split: {len(to_delete)}, new rows to insert: {len(to_insert)}")
 
-    if to_delete:
-        for chunk in chunked(to_delete, 100):
-            supabase.table("ingredient_master").delete().in_("id", chunk).execute()
+    if dry_run:
+        return
 
-    seen = set()
-    unique_insert = []
-    for item in to_insert:
-        if item["inci_name"] not in seen:
-            seen.add(item["inci_name"])
-            unique_insert.append(item)
+    delete_chunks("ingredient_master", to_delete)
+    if from_snapshot:
+        snapshot.forget_rows("ingredient_master", to_delete)
 
-    for chunk in chunked(unique_insert, 100):
-        supabase.table("ingredient_master").upsert(chunk, on_conflict="inci_name").execute()
+    # Bagian yang sudah ada pakai ejaan di DB, biar upsert kena baris yang sama
+    unique_insert = index.canonicalize(to_insert)
+    upsert_chunks("ingredient_master", unique_insert, on_conflict="inci_name")
 
     print("Done!")
 
 if __name__ == "__main__":
-    split_inci_in_db()
-    clean_duplicates()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="print what would change without writing")
+    parser.add_argument("--snapshot", action="store_true", help="read ingredient_master from a refreshed local snapshot")
+    args = parser.parse_args()
+
+    with metrics.run("clean_duplicates"):
+        if args.snapshot:
+            with span("snapshot_refresh"):
+                snapshot.refresh_table("ingredient_master")
+        with span("split_inci"):
+            split_inci_in_db(dry_run=args.dry_run, from_snapshot=args.snapshot)
+        if args.snapshot and not args.dry_run:
+            # Hasil split baru masuk DB, ambil perubahannya dulu
+            with span("snapshot_refresh"):
+                snapshot.refresh_table("ingredient_master")
+        with span("clean_duplicates"):
+            clean_duplicates(dry_run=args.dry_run, from_snapshot=args.snapshot)
+        if not args.dry_run:
+            invalidate_api_cache()
\ No newline at end of file
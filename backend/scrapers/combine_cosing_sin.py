@@ -1,51 +1,181 @@
+import argparse
 import csv
+import heapq
+import itertools
+import json
+import tempfile
+from typing import Callable, Iterator
+from scrapers.inci import normalize_inci
 
-def load_csv(path: str) -> dict[str, dict]:
-    result = {}
+SOURCES = [
+    "files/cosing_prohibited_output.csv",
+    "files/sin_list_output.csv",
+]
+OUTPUT = "files/merged_cosing_sin_output.csv"
+
+FIELDNAMES = [
+    "inci_name", "natural_origin_pct", "is_eu_banned", "is_eu_restricted",
+    "is_sin_list", "sin_list_flags", "is_nanomaterial", "is_nanomaterial_whitelisted",
+    "restriction", "data_source"
+]
+
+# Baris per run waktu external sort; run di-spill ke file temp
+SORT_CHUNK_SIZE = 100_000
+
+def is_empty(value) -> bool:
+    return value is None or str(value).strip() == ""
+
+def parse_bool(value) -> bool:
+    return str(value).strip().lower() in ("true", "t", "1", "yes")
+
+def parse_array(value) -> list[str]:
+    # Format array Postgres: {a,b}
+    if is_empty(value):
+        return []
+    return [v.strip().strip('"') for v in str(value).strip().strip("{}").split(",") if v.strip()]
+
+def policy_or(values: list) -> bool:
+    return any(parse_bool(v) for v in values)
+
+def policy_union(values: list) -> str:
+    merged = list(dict.fromkeys(v for value in values for v in parse_array(value)))
+    return "{" + ",".join(merged) + "}" if merged else ""
+
+def policy_mean(values: list) -> float | None:
+    nums = [float(v) for v in values if not is_empty(v)]
+    return sum(nums) / len(nums) if nums else None
+
+def policy_priority(values: list):
+    # Nilai pertama yang terisi, mengikuti urutan source
+    return next((v for v in values if not is_empty(v)), None)
+
+POLICY_FUNCS: dict[str, Callable[[list], object]] = {
+    "or": policy_or,
+    "union": policy_union,
+    "mean": policy_mean,
+    "priority": policy_priority,
+}
+
+# Kolom yang tidak disebut pakai "priority"
+POLICIES = {
+    "is_eu_banned": "or",
+    "is_eu_restricted": "or",
+    "is_sin_list": "or",
+    "is_nanomaterial": "or",
+    "is_nanomaterial_whitelisted": "or",
+    "sin_list_flags": "union",
+    "restriction": "union",
+    "natural_origin_pct": "priority",
+    "data_source": "priority",
+}
+
+def _spill(rows: list[tuple[str, dict]]) -> Iterator[tuple[str, dict]]:
+    rows.sort(key=lambda item: item[0])
+    f = tempfile.TemporaryFile("w+", encoding="utf-8")
+    for key, row in rows:
+        f.write(json.dumps([key, row]) + "\n")
+    f.seek(0)
+
+    def read():
+        with f:
+            for line in f:
+                key, row = json.loads(line)
+                yield key, row
+    return read()
+
+def sorted_source(path: str, chunk_size: int = SORT_CHUNK_SIZE) -> Iterator[tuple[str, dict]]:
+    """Rows of `path` as (normalized key, row), sorted by key, in bounded memory.
+
+    Only the first row per key is kept, like the old dict-based loader.
+    """
+    runs = []
+    chunk = []
     with open(path, newline="", encoding="utf-8") as f:
         for row in csv.DictReader(f):
-            inci = row["inci_name"].strip()
-            if inci and inci not in result:
-                result[inci] = row
-    return result
+            key = normalize_inci(row["inci_name"])
+            if not key:
+                continue
+            chunk.append((key, row))
+            if len(chunk) >= chunk_size:
+                runs.append(_spill(chunk))
+                chunk = []
+    if runs:
+        runs.append(_spill(chunk))
+        stream = heapq.merge(*runs, key=lambda item: item[0])
+    else:
+        stream = iter(sorted(chunk, key=lambda item: item[0]))
 
-def merge():
-    banned = load_csv("files/cosing_prohibited_output.csv")
-    sin = load_csv("files/sin_list_output.csv")
+    for key, group in itertools.groupby(stream, key=lambda item: item[0]):
+        yield key, next(group)[1]
 
+def merge_rows(rows: list[dict | None], policies: dict[str, str]) -> dict:
+    """Combine one key's rows (one slot per source, None if absent)."""
+    present = [row for row in rows if row is not None]
     merged = {}
+    for field in FIELDNAMES:
+        values = [row.get(field) for row in present]
+        merged[field] = POLICY_FUNCS[policies.get(field, "priority")](values)
+    merged["inci_name"] = present[0]["inci_name"].strip()
+    return merged
+
+def merge(sources: list[str] = SOURCES, output: str = OUTPUT, policies: dict[str, str] = POLICIES):
+    """Sort-merge any number of source CSVs on normalized INCI/CAS into `output`.
+
+    Column conflicts are resolved by `policies`; for "priority" the earlier
+    source in `sources` wins.
+    """
+    def tagged(i: int, path: str):
+        for key, row in sorted_source(path):
+            yield key, i, row
+
+    streams = [tagged(i, path) for i, path in enumerate(sources)]
+    merged_stream = heapq.merge(*streams, key=lambda item: item[0])
 
-    # Add all banned entries
-    for inci, row in banned.items():
-        merged[inci] = row.copy()
-
-    # Merge sin list entries
-    for inci, row in sin.items():
-        if inci in merged:
-            # Conflict: exists in both → is_eu_banned = True, is_sin_list = True
-            merged[inci]["is_eu_banned"] = True
-            merged[inci]["is_sin_list"] = True
-            merged[inci]["sin_list_flags"] = row["sin_list_flags"]
-        else:
-            merged[inci] = row.copy()
-
-    # Write output
-    fieldnames = [
-        "inci_name", "natural_origin_pct", "is_eu_banned", "is_eu_restricted",
-        "is_sin_list", "sin_list_flags", "is_nanomaterial", "is_nanomaterial_whitelisted",
-        "restriction", "data_source"
-    ]
-
-    with open("files/merged_cosing_sin_output.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+    per_source = [0] * len(sources)
+    pair_overlap = {(a, b): 0 for a, b in itertools.combinations(range(len(sources)), 2)}
+    in_all = 0
+    total = 0
+
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
-        for row in merged.values():
-            writer.writerow({k: row.get(k, None) for k in fieldnames})
+        for key, group in itertools.groupby(merged_stream, key=lambda item: item[0]):
+            rows: list[dict | None] = [None] * len(sources)
+            for _, i, row in group:
+                rows[i] = row
+
+            hit = [i for i, row in enumerate(rows) if row is not None]
+            for i in hit:
+                per_source[i] += 1
+            for a, b in itertools.combinations(hit, 2):
+                pair_overlap[(a, b)] += 1
+            if len(hit) == len(sources):
+                in_all += 1
+            total += 1
+
+            writer.writerow(merge_rows(rows, policies))
 
-    print(f"Done. Total unique entries: {len(merged)}")
-    print(f"  From cosing_prohibited: {len(banned)}")
-    print(f"  From sin_list: {len(sin)}")
-    print(f"  Overlap (both): {len(set(banned) & set(sin))}")
+    print(f"Done. Total unique entries: {total}")
+    for path, count in zip(sources, per_source):
+        print(f"  From {path}: {count}")
+    for (a, b), count in pair_overlap.items():
+        print(f"  Overlap {sources[a]} & {sources[b]}: {count}")
+    if len(sources) > 2:
+        print(f"  Overlap (all): {in_all}")
 
 if __name__ == "__main__":
-    merge()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", action="append", dest="sources", help="source CSV, earlier ones win priority conflicts")
+    parser.add_argument("--output", default=OUTPUT)
+    parser.add_argument("--policy", action="append", default=[], metavar="COLUMN=POLICY",
+                        help=f"override a column policy ({', '.join(POLICY_FUNCS)})")
+    args = parser.parse_args()
+
+    policies = dict(POLICIES)
+    for item in args.policy:
+        column, _, policy = item.partition("=")
+        if policy not in POLICY_FUNCS:
+            parser.error(f"unknown policy {policy!r} for {column}")
+        policies[column] = policy
+
+    merge(args.sources or SOURCES, args.output, policies)
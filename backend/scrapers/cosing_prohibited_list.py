@@ -1,70 +1,168 @@
 import pdfplumber
 import csv
+import hashlib
+import json
+import os
 import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pdfminer.pdftypes import resolve1
+from typing import Iterator
+from scrapers.metrics import count, metrics, span
 
-def extract_cas_numbers(pdf_path: str) -> list[str]:
+# CAS number pattern: digits-digits-digits
+CAS_PATTERN = re.compile(r'\b\d{1,7}-\d{2}-\d\b')
+
+PAGE_CACHE_PATH = "files/cosing_page_cache.sqlite"
+PAGES_PER_TASK = 8
+
+FIELDNAMES = [
+    "inci_name",
+    "natural_origin_pct",
+    "is_eu_banned",
+    "is_eu_restricted",
+    "is_sin_list",
+    "sin_list_flags",
+    "is_nanomaterial",
+    "is_nanomaterial_whitelisted",
+    "restriction",
+    "data_source"
+]
+
+def page_key(page) -> str:
+    """Hash of the page's content streams.
+
+    Pages of a new annex revision that didn't change keep their key, so only
+    the changed ones miss the cache.
+    """
+    h = hashlib.sha256()
+    for stream in page.page_obj.contents:
+        h.update(resolve1(stream).get_data())
+    return h.hexdigest()
+
+def extract_page(page) -> list[str]:
     cas_numbers = []
-    # CAS number pattern: digits-digits-digits
-    cas_pattern = re.compile(r'\b\d{1,7}-\d{2}-\d\b')
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            tables = page.extract_tables()
-            for table in tables:
-                for row in table:
-                    if not row:
-                        continue
-                    # CAS Number is the 3rd column (index 2)
-                    for cell in row:
-                        if cell and cas_pattern.match(str(cell).strip()):
-                            # Handle multiple CAS numbers in one cell (e.g. "132-60-5 / 5949-18-8")
-                            found = cas_pattern.findall(str(cell))
-                            cas_numbers.extend(found)
+    # Tanpa pola CAS di text layer, skip table detection yang mahal
+    text = page.extract_text() or ""
+    if not CAS_PATTERN.search(text):
+        return cas_numbers
 
+    for table in page.extract_tables():
+        for row in table:
+            if not row:
+                continue
+            # CAS Number is the 3rd column (index 2)
+            for cell in row:
+                if cell and CAS_PATTERN.match(str(cell).strip()):
+                    # Handle multiple CAS numbers in one cell (e.g. "132-60-5 / 5949-18-8")
+                    found = CAS_PATTERN.findall(str(cell))
+                    cas_numbers.extend(found)
     return cas_numbers
 
+def open_cache(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, cas TEXT NOT NULL)")
+    return conn
+
+def extract_page_range(pdf_path: str, start: int, end: int, cache_path: str) -> list[tuple[str, list[str], bool]]:
+    """Worker: return (key, cas numbers, from cache) for pages start..end-1."""
+    conn = open_cache(cache_path)
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[start:end]:
+            key = page_key(page)
+            row = conn.execute("SELECT cas FROM pages WHERE key = ?", (key,)).fetchone()
+            if row:
+                results.append((key, json.loads(row[0]), True))
+            else:
+                results.append((key, extract_page(page), False))
+            page.close()
+    conn.close()
+    return results
+
+def iter_cas_numbers(pdf_path: str, workers: int | None = None, cache_path: str = PAGE_CACHE_PATH) -> Iterator[str]:
+    """Yield the CAS numbers of the PDF in page order.
+
+    Page ranges are parsed in a process pool; each range is yielded as soon as
+    it and every range before it are done. New page results go into the cache
+    at `cache_path`.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        total = len(pdf.pages)
+
+    conn = open_cache(cache_path)
+    ranges = [(i, min(i + PAGES_PER_TASK, total)) for i in range(0, total, PAGES_PER_TASK)]
+    cached = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(extract_page_range, pdf_path, start, end, cache_path) for start, end in ranges]
+        for (start, end), future in zip(ranges, futures):
+            # Waktu tunggu hasil worker; parsing-nya sendiri jalan paralel
+            with span("pdf_pages"):
+                results = future.result()
+            for key, cas_numbers, from_cache in results:
+                if from_cache:
+                    cached += 1
+                else:
+                    conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?)", (key, json.dumps(cas_numbers)))
+                count("pages", cached=from_cache)
+                count("rows", len(cas_numbers))
+                yield from cas_numbers
+            conn.commit()
+            print(f"  Pages {start + 1}-{end} of {total} done")
+
+    conn.close()
+    print(f"  {cached} of {total} pages from cache")
+
+def extract_cas_numbers(pdf_path: str) -> list[str]:
+    return list(iter_cas_numbers(pdf_path))
+
+def to_row(cas: str) -> dict:
+    return {
+        "inci_name": cas,
+        "natural_origin_pct": 10,
+        "is_eu_banned": True,
+        "is_eu_restricted": False,
+        "is_sin_list": False,
+        "sin_list_flags": None,
+        "is_nanomaterial": False,
+        "is_nanomaterial_whitelisted": False,
+        "restriction": None,
+        "data_source": "COSING Prohibited List"
+    }
 
-def save_to_csv(cas_numbers: list[str], output_path: str = "cosing_prohibited_output.csv"):
+def save_to_csv(cas_numbers, output_path: str = "files/cosing_prohibited_output.csv") -> int:
+    """Write `cas_numbers` (any iterable, consumed lazily) and return the count."""
+    written = 0
+    sample = []
     with open(output_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "inci_name",
-            "natural_origin_pct",
-            "is_eu_banned",
-            "is_eu_restricted",
-            "is_sin_list",
-            "sin_list_flags",
-            "is_nanomaterial",
-            "is_nanomaterial_whitelisted",
-            "restriction",
-            "data_source"
-        ])
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
         for cas in cas_numbers:
-            writer.writerow({
-                "inci_name": cas,
-                "natural_origin_pct": 10,
-                "is_eu_banned": True,
-                "is_eu_restricted": False,
-                "is_sin_list": False,
-                "sin_list_flags": None,
-                "is_nanomaterial": False,
-                "is_nanomaterial_whitelisted": False,
-                "restriction": None,
-                "data_source": "COSING Prohibited List"
-            })
-    print(f"Saved {len(cas_numbers)} entries to {output_path}")
+            writer.writerow(to_row(cas))
+            written += 1
+            if len(sample) < 5:
+                sample.append(cas)
+    if sample:
+        print("Sample:", sample)
+    print(f"Saved {written} entries to {output_path}")
+    return written
 
 
 def main():
-    pdf_path = "COSING_PROHIBITED_ANNEX_2.pdf"
+    pdf_path = "files/COSING_PROHIBITED_ANNEX_2.pdf"
     print(f"Extracting CAS numbers from {pdf_path}...")
-    cas_numbers = extract_cas_numbers(pdf_path)
-    print(f"Found {len(cas_numbers)} CAS numbers")
+    tmp_path = "files/cosing_prohibited_output.csv.tmp"
+    written = save_to_csv(iter_cas_numbers(pdf_path), tmp_path)
+    print(f"Found {written} CAS numbers")
 
-    if cas_numbers:
-        print("Sample:", cas_numbers[:5])
-        save_to_csv(cas_numbers)
+    if written:
+        os.replace(tmp_path, "files/cosing_prohibited_output.csv")
+    else:
+        os.remove(tmp_path)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with metrics.run("cosing_prohibited"):
+        main()
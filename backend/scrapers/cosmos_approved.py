@@ -1,57 +1,60 @@
 import asyncio
-from playwright.async_api import async_playwright
-from database import supabase
+from scrapers.journal import PageJournal
+from scrapers.metrics import metrics
+from scrapers.paginated import parse_page_args, scrape_table_pages
+from scrapers.tables import Column, parse_pct
+from scrapers.inci import REVIEW_THRESHOLD, InciIndex
+from scrapers.batch import invalidate_api_cache
+from scrapers.sync_state import sync_rows
 
-START_PAGE = 201
-END_PAGE = 229
+START_PAGE = 1
 
-async def scrape_cosmos_certified():
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
-            data =[]
-            for page_num in range (START_PAGE, END_PAGE+1):
-                await page.goto(f"https://www.cosmos-standard.org/en/databases/approved-raw-materials/?page={page_num}")
-                print("PAGE: ", page_num)
-            
-                # adjustable
-                await page.wait_for_selector("table", timeout=15000)
-                
-                rows = await page.query_selector_all("table tbody tr")
-                
-                for row in rows:
-                    cols = await row.query_selector_all("td")
-                    if len(cols) < 2:
-                        continue
-                    
-                    inci_name = (await cols[1].inner_text()).strip()
-                    pemo_pct_raw = (await cols[4].inner_text()).strip()
-                    restriction = (await cols[9].inner_text()).strip()
-                    
-                    try:
-                        bio_pct = 100 - float(pemo_pct_raw.replace("%", "").replace(",", "."))
-                    except ValueError:
-                        print("ValueError")
-                        return ValueError #ini gue bedain
-                    
-                    if inci_name:
-                        data.append({
-                            "inci_name": inci_name,
-                            "natural_origin_pct": bio_pct,
-                            "data_source": "COSMOS Certified Raw Materials without Organic Content",
-                            "restriction": restriction if restriction else None
-                        })
-                
-            
-            await browser.close()
-            return data
+URL = "https://www.cosmos-standard.org/en/databases/approved-raw-materials/?page={page}"
 
-async def main():
+def parse_pemo(raw: str) -> float:
+    # kolom ini PEMO (non-natural), natural origin = sisanya
+    return 100 - parse_pct(raw)
+
+COLUMNS = [
+    Column("inci_name", 1),
+    Column("natural_origin_pct", 4, parse_pemo),
+    Column("restriction", 9),
+]
+
+def build_row(record: dict) -> dict | None:
+    if not record["inci_name"]:
+        return None
+
+    return {
+        "inci_name": record["inci_name"],
+        "natural_origin_pct": record["natural_origin_pct"],
+        "data_source": "COSMOS Certified Raw Materials without Organic Content",
+        "restriction": record["restriction"] if record["restriction"] else None
+    }
+
+async def scrape_cosmos_certified(start_page: int = START_PAGE, end_page: int | None = None, resume: bool = False, url_template: str = URL, **kwargs):
+    return await scrape_table_pages(
+        url_template, COLUMNS, build_row, start_page, end_page,
+        journal=PageJournal("cosmos_approved"), resume=resume, **kwargs,
+    )
+
+def upload(data: list[dict]) -> int:
+    """Upsert the rows that changed since the last upload; returns how many were sent."""
+    # Samakan ejaan dengan yang sudah ada di DB, buang duplikat
+    index = InciIndex.load(review_threshold=REVIEW_THRESHOLD)
+    unique_data = index.canonicalize(data)
+    index.report_candidates("cosmos_approved")
+
+    diff = sync_rows("cosmos_approved", "ingredient_master", unique_data, key="inci_name")
+    if diff.changed:
+        invalidate_api_cache([row["inci_name"] for row in diff.changed])
+    return len(diff.changed)
+
+async def main(args):
     print("starts scraping:")
     print("==================================\n")
     
-    data = await scrape_cosmos_certified()
+    data = await scrape_cosmos_certified(args.start, args.end, args.resume, concurrency=args.concurrency, mode=args.mode)
     print(f"found {len(data)} data rows")
     
     if data:
@@ -60,19 +63,11 @@ async def main():
         proceed = input("Proceed to upload to supabase? (y/n): ")
         
         if(proceed == "y"):
-            # sebelum upsert
-            seen = set()
-            unique_data = []
-            for item in data:
-                if item["inci_name"] not in seen:
-                    seen.add(item["inci_name"])
-                    unique_data.append(item)
-
-            res = supabase.table("ingredient_master").upsert(
-                unique_data, on_conflict="inci_name"
-            ).execute()
-                        
-            print("Done: ", len(res.data), "rows inserted")
+            # Client DB-nya sync: jalankan di thread biar event loop gak ke-block
+            inserted = await asyncio.to_thread(upload, data)
+            print("Done: ", inserted, "rows upserted")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_page_args()
+    with metrics.run("cosmos_approved"):
+        asyncio.run(main(args))
\ No newline at end of file
@@ -1,82 +1,92 @@
 import asyncio
 import re
-from playwright.async_api import async_playwright
-from database import supabase
+from scrapers.journal import PageJournal
+from scrapers.metrics import metrics
+from scrapers.paginated import parse_page_args, scrape_table_pages
+from scrapers.tables import Column
+from scrapers.batch import fetch_map, insert_chunks
 
-START_PAGE = 201
-END_PAGE = 400  # adjust manually
+START_PAGE = 1
 
 def clean_commercial_name(name: str) -> str:
     return re.sub(r"^[\d\s\-]+", "", name).strip()
 
-async def get_or_create_corporation(corp_name: str) -> str:
-    existing = supabase.table("corporations").select("id").eq("name", corp_name).execute()
-    if existing.data:
-        return existing.data[0]["id"]
-    res = supabase.table("corporations").insert({
-        "name": corp_name,
-        "free_animal_testing": True
-    }).execute()
-    return res.data[0]["id"]
-
-async def get_or_create_brand(brand_name: str, corp_id: str) -> str:
-    existing = supabase.table("brands").select("id").eq("name", brand_name).execute()
-    if existing.data:
-        return existing.data[0]["id"]
-    res = supabase.table("brands").insert({
-        "name": brand_name,
-        "corp_id": corp_id
-    }).execute()
-    return res.data[0]["id"]
-
-async def scrape_cosmos_products():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-
-        data = []
-        for page_num in range(START_PAGE, END_PAGE + 1):
-            await page.goto(f"https://www.cosmos-standard.org/en/databases/products-directory/?page={page_num}")
-            print(f"PAGE: {page_num}")
-
-            await page.wait_for_selector("table", timeout=15000)
-            rows = await page.query_selector_all("table#product-table tbody tr")
-                        
-            for row in rows:
-                cells = await row.evaluate("""row => {
-                    const th = row.querySelector('th') ? row.querySelector('th').innerText.trim() : ''
-                    const tds = Array.from(row.querySelectorAll('td')).map(td => td.innerText.trim())
-                    return [th, ...tds]
-                }""")
-                
-                if len(cells) < 4:
-                    continue
-                
-                commercial_name_raw = cells[0]  # th
-                cosmos_signature    = cells[1]  # td[0]
-                brand_name          = cells[2]  # td[1]
-                company_name        = cells[3]  # td[2]
-
-                commercial_name = clean_commercial_name(commercial_name_raw)
-
-                if not commercial_name:
-                    continue
-
-                data.append({
-                    "commercial_name": commercial_name,
-                    "cosmos_signature": cosmos_signature,
-                    "brand_name": brand_name,
-                    "company_name": company_name
-                })
-
-        await browser.close()
-        return data
-
-async def main():
+URL = "https://www.cosmos-standard.org/en/databases/products-directory/?page={page}"
+
+COLUMNS = [
+    Column("commercial_name", 0, clean_commercial_name),  # th
+    Column("cosmos_signature", 1),                        # td[0]
+    Column("brand_name", 2),                              # td[1]
+    Column("company_name", 3),                            # td[2]
+]
+
+def build_row(record: dict) -> dict | None:
+    if not record["commercial_name"]:
+        return None
+    return record
+
+async def scrape_cosmos_products(start_page: int = START_PAGE, end_page: int | None = None, resume: bool = False, url_template: str = URL, **kwargs):
+    return await scrape_table_pages(
+        url_template, COLUMNS, build_row, start_page, end_page,
+        table_selector="table#product-table",
+        cell_selector="th, td",
+        journal=PageJournal("cosmos_products"), resume=resume, **kwargs,
+    )
+
+def load_products(data: list[dict]):
+    """Insert the scraped corporations, brands and products in bulk.
+
+    Existing names are prefetched once into name → id maps, so only missing
+    rows are sent, in dependency order: corporations, brands, products.
+    """
+    corp_ids = fetch_map("corporations")
+    brand_ids = fetch_map("brands")
+    product_names = set(fetch_map("products"))
+    print(f"Existing: {len(corp_ids)} corporations, {len(brand_ids)} brands, {len(product_names)} products")
+
+    new_corps = list(dict.fromkeys(
+        e["company_name"] for e in data if e["company_name"] not in corp_ids
+    ))
+    inserted = insert_chunks("corporations", [
+        {"name": name, "free_animal_testing": True} for name in new_corps
+    ])
+    corp_ids.update({row["name"]: row["id"] for row in inserted})
+    print(f"  Inserted {len(inserted)} corporations")
+
+    # Brand baru ikut corporation dari baris pertama yang menyebutnya
+    new_brands = {}
+    for e in data:
+        if e["brand_name"] not in brand_ids and e["company_name"] in corp_ids:
+            new_brands.setdefault(e["brand_name"], corp_ids[e["company_name"]])
+    inserted = insert_chunks("brands", [
+        {"name": name, "corp_id": corp_id} for name, corp_id in new_brands.items()
+    ])
+    brand_ids.update({row["name"]: row["id"] for row in inserted})
+    print(f"  Inserted {len(inserted)} brands")
+
+    new_products = {}
+    skipped = 0
+    for e in data:
+        name = e["commercial_name"]
+        if name in product_names or name in new_products:
+            skipped += 1
+            continue
+        if e["brand_name"] not in brand_ids:
+            print(f"  Error on {name}: brand {e['brand_name']!r} missing")
+            continue
+        new_products[name] = {
+            "name": name,
+            "brand_id": brand_ids[e["brand_name"]],
+            "cosmos_cert_level": e["cosmos_signature"]
+        }
+    inserted = insert_chunks("products", list(new_products.values()))
+    print(f"  Inserted {len(inserted)} products, skipped {skipped} existing")
+
+async def main(args, url_template: str = URL):
     print("Starts scraping:")
     print("==================================\n")
 
-    data = await scrape_cosmos_products()
+    data = await scrape_cosmos_products(args.start, args.end, args.resume, url_template, concurrency=args.concurrency, mode=args.mode)
     print(f"Found {len(data)} rows")
 
     if not data:
@@ -88,28 +98,11 @@ async def main():
     #     print("Aborted.")
     #     return
 
-    for entry in data:
-        try:
-            corp_id = await get_or_create_corporation(entry["company_name"])
-            brand_id = await get_or_create_brand(entry["brand_name"], corp_id)
-
-            # Check if product already exists
-            existing = supabase.table("products").select("id").eq("name", entry["commercial_name"]).execute()
-            if existing.data:
-                print(f"  Skipped (exists): {entry['commercial_name']}")
-                continue
-
-            supabase.table("products").insert({
-                "name": entry["commercial_name"],
-                "brand_id": brand_id,
-                "cosmos_cert_level": entry["cosmos_signature"]
-            }).execute()
-
-            print(f"  Inserted: {entry['commercial_name']}")
-        except Exception as e:
-            print(f"  Error on {entry['commercial_name']}: {e}")
+    await asyncio.to_thread(load_products, data)
 
     print("Done!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_page_args()
+    with metrics.run("cosmos_products"):
+        asyncio.run(main(args))
\ No newline at end of file
@@ -0,0 +1,95 @@
+import math
+import re
+import numpy as np
+from scrapers.inci import normalize_inci
+
+DIGITS = re.compile(r"\d+")
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """Approximate INCI name matching on trigram Dice similarity.
+
+    Each query only touches the posting lists of its own trigrams: one
+    bincount gives the shared-trigram count of every name, and names below
+    the count that the threshold requires are dropped before scoring. That
+    keeps queries around a millisecond at tens of thousands of names. Names
+    are compared in normalized form, and trigram sets ignore most word-order
+    differences.
+    """
+
+    def __init__(self, names: list[str] = ()):
+        self.names: list[str] = []
+        self.keys: list[str] = []
+        self.seen: set[str] = set()
+        self.sizes: list[int] = []
+        self.postings: dict[str, list[int]] = {}
+        self._arrays: dict[str, np.ndarray] = {}
+        self._sizes: np.ndarray | None = None
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name: str):
+        key = normalize_inci(name)
+        if not key or key in self.seen:
+            return
+        self.seen.add(key)
+        grams = trigrams(key)
+        i = len(self.names)
+        self.names.append(name)
+        self.keys.append(key)
+        self.sizes.append(len(grams))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(i)
+            self._arrays.pop(gram, None)
+        self._sizes = None
+
+    def _posting(self, gram: str) -> np.ndarray | None:
+        arr = self._arrays.get(gram)
+        if arr is None and gram in self.postings:
+            arr = self._arrays[gram] = np.array(self.postings[gram], dtype=np.int32)
+        return arr
+
+    def search(self, name: str, k: int = 5, threshold: float = 0.5, same_digits: bool = False) -> list[tuple[str, float]]:
+        """Top `k` (name, similarity) pairs with similarity >= `threshold`, best first.
+
+        With `same_digits` candidates must carry the same numbers as the query,
+        so "PEG-40" never matches "PEG-45".
+        """
+        key = normalize_inci(name)
+        grams = trigrams(key)
+        lists = sorted((arr for gram in grams if (arr := self._posting(gram)) is not None), key=len)
+
+        # Dice >= t butuh minimal segini trigram yang sama: 2c >= t(|q| + c)
+        min_shared = max(1, math.ceil(threshold * len(grams) / (2 - threshold)))
+        if min_shared > len(lists):
+            return []
+
+        if self._sizes is None:
+            self._sizes = np.array(self.sizes, dtype=np.float64)
+
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        candidates = np.flatnonzero(shared >= min_shared)
+        shared = shared[candidates]
+        scores = 2 * shared / (len(grams) + self._sizes[candidates])
+
+        keep = scores >= threshold
+        candidates, scores = candidates[keep], scores[keep]
+        if same_digits and len(candidates):
+            digits = DIGITS.findall(key)
+            keep = np.array([DIGITS.findall(self.keys[j]) == digits for j in candidates])
+            candidates, scores = candidates[keep], scores[keep]
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(self.names[candidates[i]], round(float(scores[i]), 4)) for i in order]
+
+    def best(self, name: str, threshold: float = 0.85, same_digits: bool = True) -> str | None:
+        matches = self.search(name, k=1, threshold=threshold, same_digits=same_digits)
+        return matches[0][0] if matches else None
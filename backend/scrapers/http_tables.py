@@ -0,0 +1,77 @@
+import re
+import httpx
+from bs4 import BeautifulSoup
+from scrapers.metrics import count, span
+from scrapers.tables import Column, Table, to_records
+from scrapers.throttle import host_controller
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; NausicaBot/1.0)"}
+# Whitespace HTML (bukan &nbsp;) yang digabung jadi satu spasi oleh innerText
+HTML_WHITESPACE = re.compile(r"[ \t\r\n\f]+")
+# Penanda sementara untuk <br>, gak mungkin muncul di teks HTML
+LINE_BREAK = "\x00"
+
+class TableNotFound(Exception):
+    """The HTML has no table matching the selector, e.g. it is rendered by JS."""
+
+def new_client(concurrency: int) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=15,
+        headers=HEADERS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    )
+
+def cell_text(cell) -> str:
+    """Text of `cell` the way the browser's innerText.trim() reads it.
+
+    Source whitespace collapses to one space and <br> becomes a line break,
+    so both fetch modes return the same strings.
+    """
+    for br in cell.find_all("br"):
+        br.replace_with(LINE_BREAK)
+    lines = [HTML_WHITESPACE.sub(" ", line).strip() for line in cell.get_text().split(LINE_BREAK)]
+    return "\n".join(lines).strip()
+
+def parse_html_table(
+    html: str,
+    columns: list[Column],
+    table_selector: str = "table",
+    row_selector: str = "tbody tr",
+    cell_selector: str = "td",
+) -> Table:
+    """Server-side counterpart of tables.extract_table, on raw HTML."""
+    soup = BeautifulSoup(html, PARSER)
+    table = soup.select_one(table_selector)
+    if table is None:
+        raise TableNotFound(table_selector)
+
+    headers = [cell_text(th) for th in table.select("thead th")]
+    rows = [
+        [cell_text(cell) for cell in row.select(cell_selector)]
+        for row in table.select(row_selector)
+    ]
+    return Table(headers, to_records(rows, columns))
+
+async def fetch_html_table(
+    client: httpx.AsyncClient,
+    url: str,
+    columns: list[Column],
+    table_selector: str = "table",
+    row_selector: str = "tbody tr",
+    cell_selector: str = "td",
+    retries: int | None = None,
+) -> Table:
+    """GET `url` through its host's controller (with its `retries`) and parse the table."""
+    with span("http_get"):
+        res = await host_controller(url).request(lambda: client.get(url), retries=retries)
+    count("bytes", res.num_bytes_downloaded, via="http")
+    res.raise_for_status()
+    with span("parse"):
+        return parse_html_table(res.text, columns, table_selector, row_selector, cell_selector)
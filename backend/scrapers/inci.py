@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import unicodedata
+from datetime import datetime, timezone
+from scrapers.batch import iter_rows
+from scrapers.metrics import count
+
+WHITESPACE = re.compile(r"\s+")
+# "(and)", "( AND )", "(&)" dan variannya
+AND_MARKER = re.compile(r"\s*\(\s*(?:and|&)\s*\)\s*", re.IGNORECASE)
+SEPARATORS = re.compile(r"\s*(?:\(\s*(?:and|&)\s*\)|,|\+|&)\s*", re.IGNORECASE)
+SEPARATORS_WITH_SLASH = re.compile(r"\s*(?:\(\s*(?:and|&)\s*\)|,|\+|&|/)\s*", re.IGNORECASE)
+SLASH = re.compile(r"\s*/\s*")
+HYPHEN = re.compile(r"\s*-\s*")
+# Ambang kandidat fuzzy waktu ingestion: gak digabung otomatis, cuma dicatat buat dicek manual
+REVIEW_THRESHOLD = 0.9
+REVIEW_DIR = "files/review"
+# Berapa kandidat yang dicetak; daftar lengkapnya ada di file
+REVIEW_SAMPLE = 10
+
+def clean_inci(name: str) -> str:
+    """Display form: unicode-normalised, whitespace collapsed, outer spaces stripped."""
+    return WHITESPACE.sub(" ", unicodedata.normalize("NFKC", name)).strip()
+
+def normalize_inci(name: str) -> str:
+    """Identity key of an INCI name; names with the same key are the same ingredient.
+
+    Case, whitespace, "(and)" spellings and spacing around "/" and "-" are
+    folded, so "Aqua / Water" and "AQUA/WATER" share a key.
+    """
+    key = clean_inci(name).casefold()
+    key = AND_MARKER.sub(" (and) ", key)
+    key = SLASH.sub("/", key)
+    key = HYPHEN.sub("-", key)
+    return WHITESPACE.sub(" ", key).strip(" .;")
+
+def split_mixture(name: str) -> list[str]:
+    """Split a mixture like "Glycerin (and) Aqua" into its ingredients.
+
+    "/" only separates when it appears more than once, since a single slash is
+    usually a synonym pair ("Aqua/Water").
+    """
+    pattern = SEPARATORS_WITH_SLASH if name.count("/") > 1 else SEPARATORS
+    return [clean_inci(part) for part in pattern.split(name) if part.strip()]
+
+class InciIndex:
+    """Normalized INCI key → (id, stored name) of ingredient_master.
+
+    Scrapers check incoming names against it before writing, so a spelling
+    variant of an existing ingredient updates that row instead of adding a
+    near-duplicate. Only exact normalized keys match: with `review_threshold`
+    set, names without one are also compared to the indexed names by trigram
+    similarity (same numbers required, see scrapers.fuzzy), and close ones
+    are collected in `candidates` for review instead of being merged, since
+    "GLYCERYL STEARATE SE" and "GLYCERYL STEARATE" are different ingredients.
+    """
+
+    def __init__(self, entries: dict[str, tuple] | None = None, review_threshold: float | None = None):
+        self.entries = entries or {}
+        self.review_threshold = review_threshold
+        self.fuzzy = None
+        # Normalized key nama baru → (nama baru, nama mirip di index, skor)
+        self.candidates: dict[str, tuple[str, str, float]] = {}
+
+    @classmethod
+    def load(cls, review_threshold: float | None = None) -> "InciIndex":
+        index = cls(review_threshold=review_threshold)
+        for row in iter_rows("ingredient_master", "id, inci_name", prefetch=True):
+            index.add(row["inci_name"], row["id"])
+        print(f"INCI index: {len(index)} names")
+        return index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_inci(name) in self.entries
+
+    def get(self, name: str) -> tuple | None:
+        return self.entries.get(normalize_inci(name))
+
+    def add(self, name: str, id=None):
+        key = normalize_inci(name)
+        if key not in self.entries:
+            self.entries[key] = (id, name)
+            if self.fuzzy is not None:
+                self.fuzzy.add(name)
+
+    def match(self, name: str) -> tuple | None:
+        """(id, stored name) of `name` on an exact normalized key, noting close spellings for review."""
+        entry = self.get(name)
+        if entry is None and self.review_threshold is not None:
+            self._review(name)
+        return entry
+
+    def _review(self, name: str):
+        key = normalize_inci(name)
+        if key in self.candidates:
+            return
+        if self.fuzzy is None:
+            # Import di sini: scrapers.fuzzy sendiri butuh normalize_inci
+            from scrapers.fuzzy import TrigramIndex
+            self.fuzzy = TrigramIndex([stored for _, stored in self.entries.values()])
+        matches = self.fuzzy.search(name, k=1, threshold=self.review_threshold, same_digits=True)
+        if matches:
+            similar, score = matches[0]
+            self.candidates[key] = (clean_inci(name), similar, round(score, 3))
+            count("inci_review_candidates")
+
+    def canonical(self, name: str) -> str:
+        """Stored spelling of `name` if it is already indexed, else its clean form."""
+        entry = self.match(name)
+        return entry[1] if entry else clean_inci(name)
+
+    def report_candidates(self, feed: str, directory: str = REVIEW_DIR) -> str | None:
+        """Write this run's fuzzy candidates to REVIEW_DIR/<feed>-inci.json and print a sample."""
+        path = os.path.join(directory, f"{feed}-inci.json")
+        if not self.candidates:
+            # Laporan run sebelumnya sudah gak berlaku
+            if os.path.exists(path):
+                os.remove(path)
+            return None
+        rows = [
+            {"inci_name": name, "similar_to": similar, "score": score}
+            for name, similar, score in sorted(self.candidates.values())
+        ]
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "feed": feed,
+                "reported_at": datetime.now(timezone.utc).isoformat(),
+                "candidates": rows,
+            }, f, ensure_ascii=False, indent=2)
+        sample = ", ".join(f"{r['inci_name']} ~ {r['similar_to']}" for r in rows[:REVIEW_SAMPLE])
+        more = f" and {len(rows) - REVIEW_SAMPLE} more" if len(rows) > REVIEW_SAMPLE else ""
+        print(f"{len(rows)} new INCI names close to existing ones (kept as new, review before merging): "
+              f"{sample}{more}; full list in {path}")
+        return path
+
+    def canonicalize(self, rows: list[dict], key: str = "inci_name") -> list[dict]:
+        """Rewrite `rows[key]` to the stored spelling and drop in-batch duplicates.
+
+        The first row per normalized name wins; new names are added to the
+        index so later batches see them too.
+        """
+        seen = set()
+        unique = []
+        for row in rows:
+            if not normalize_inci(row[key]):
+                continue
+            # Dicek setelah canonical: dua ejaan bisa jatuh ke nama yang sama
+            name = self.canonical(row[key])
+            norm = normalize_inci(name)
+            if norm in seen:
+                continue
+            seen.add(norm)
+            row = {**row, key: name}
+            self.add(row[key])
+            unique.append(row)
+        return unique
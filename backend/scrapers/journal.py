@@ -0,0 +1,41 @@
+import json
+import os
+
+JOURNAL_DIR = "files/journal"
+
+class PageJournal:
+    """Append-only JSON-lines log of finished pages and their rows.
+
+    Every line is `{"page": n, "rows": [...]}` and is flushed to disk as soon
+    as the page is done, so a crashed crawl can resume from what it had. A page
+    whose table came back empty is stored with `"rows": null`, marking the end
+    of the listing.
+    """
+
+    def __init__(self, name: str, directory: str = JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.jsonl")
+
+    def load(self) -> dict[int, list[dict] | None]:
+        pages = {}
+        if not os.path.exists(self.path):
+            return pages
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # baris terakhir bisa kepotong kalau crash pas nulis
+                    continue
+                pages[entry["page"]] = entry["rows"]
+        return pages
+
+    def record(self, page_num: int, rows: list[dict] | None):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"page": page_num, "rows": rows}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
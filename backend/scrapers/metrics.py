@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator
+
+METRICS_DIR = os.getenv("SCRAPER_METRICS_DIR", "files/metrics")
+QUANTILES = (0.5, 0.95)
+
+# Label yang ikut ke semua span/counter di dalam scope (ikut ke task dan to_thread)
+_scope: ContextVar[dict[str, str]] = ContextVar("metrics_scope", default={})
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in {**_scope.get(), **labels}.items())))
+
+def _is_timeout(e: BaseException) -> bool:
+    # asyncio/builtin, Playwright dan httpx punya kelas timeout sendiri-sendiri
+    return isinstance(e, TimeoutError) or "Timeout" in type(e).__name__
+
+def _quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def _prom_labels(labels: tuple, **extra) -> str:
+    items = [*labels, *extra.items()]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items) + "}"
+
+class Metrics:
+    """Timing spans, counters and a JSON-lines event log for scraper runs.
+
+    Spans record how long a phase took (goto, wait_for_selector, extract,
+    db writes, ...) and count timeouts per phase; counters track rows,
+    pages, retries and bytes. Everything is kept in memory for the run
+    summary; with a run started, every span and event is also appended to
+    METRICS_DIR/<run>-<timestamp>.jsonl. Safe to use from threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.run_name: str | None = None
+        self.started = time.perf_counter()
+        self.spans: dict[tuple, list[float]] = {}
+        self.counters: dict[tuple, float] = {}
+        self.log = None
+
+    def event(self, kind: str, **fields):
+        if self.log is None:
+            return
+        line = json.dumps({
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "run": self.run_name,
+            "event": kind,
+            **_scope.get(),
+            **fields,
+        }, default=str)
+        with self.lock:
+            if self.log is not None:
+                self.log.write(line + "\n")
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """Time the block as phase `name`; a timeout inside it is counted too."""
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            key = _key(name, labels)
+            with self.lock:
+                self.spans.setdefault(key, []).append(seconds)
+            if error is not None and _is_timeout(error):
+                self.count("timeouts", phase=name, **labels)
+            self.event(
+                "span", name=name, seconds=round(seconds, 4), **labels,
+                **({"error": type(error).__name__} if error is not None else {}),
+            )
+
+    @contextmanager
+    def scope(self, **labels) -> Iterator[None]:
+        """Add `labels` to everything recorded inside the block."""
+        token = _scope.set({**_scope.get(), **{k: str(v) for k, v in labels.items()}})
+        try:
+            yield
+        finally:
+            _scope.reset(token)
+
+    @contextmanager
+    def run(self, name: str, log: bool = True, prometheus: bool = True) -> Iterator["Metrics"]:
+        """Collect metrics for one scraper run and report them at the end.
+
+        Prints the summary when the block exits and, with `prometheus`,
+        writes METRICS_DIR/<name>.prom in Prometheus text format (the
+        latest run per name, e.g. for a node_exporter textfile collector).
+        """
+        self.reset()
+        self.run_name = name
+        if log:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            self.log = open(os.path.join(METRICS_DIR, f"{name}-{stamp}.jsonl"), "a", encoding="utf-8", buffering=1)
+        self.event("run_start")
+        try:
+            yield self
+        finally:
+            self.event("run_end", seconds=round(self.elapsed(), 3), counters={
+                "/".join([counter, *(f"{k}={v}" for k, v in labels)]): value
+                for (counter, labels), value in self.counters.items()
+            })
+            print(self.summary())
+            if prometheus:
+                self.write_prometheus(os.path.join(METRICS_DIR, f"{name}.prom"))
+            if self.log is not None:
+                self.log.close()
+                self.log = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def total(self, name: str) -> float:
+        return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def summary(self) -> str:
+        elapsed = self.elapsed()
+        lines = [f"\n=== Metrics: {self.run_name or 'run'} ({elapsed:.1f}s) ==="]
+        if self.spans:
+            lines.append(f"{'phase':<40} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+            for (name, labels), values in sorted(self.spans.items(), key=lambda item: -sum(item[1])):
+                label = name + "".join(f" {k}={v}" for k, v in labels)
+                lines.append(
+                    f"{label[:40]:<40} {len(values):>7} {sum(values):>9.2f} "
+                    f"{_quantile(values, 0.5) * 1000:>9.1f} {_quantile(values, 0.95) * 1000:>9.1f} {max(values) * 1000:>9.1f}"
+                )
+        for (name, labels), value in sorted(self.counters.items()):
+            label = name + "".join(f" {k}={v}" for k, v in labels)
+            lines.append(f"{label:<40} {value:>12g}")
+        rows = self.total("rows")
+        if rows and elapsed:
+            lines.append(f"{'rows/sec':<40} {rows / elapsed:>12.1f}")
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """The collected metrics in Prometheus text exposition format."""
+        run = {"run": self.run_name or "run"}
+        out = [
+            "# TYPE scraper_run_seconds gauge",
+            f"scraper_run_seconds{_prom_labels((), **run)} {self.elapsed():.3f}",
+            "# TYPE scraper_phase_seconds summary",
+        ]
+        for (name, labels), values in sorted(self.spans.items()):
+            base = (("phase", name), *labels, *run.items())
+            for q in QUANTILES:
+                out.append(f"scraper_phase_seconds{_prom_labels(base, quantile=q)} {_quantile(values, q):.6f}")
+            out.append(f"scraper_phase_seconds_sum{_prom_labels(base)} {sum(values):.6f}")
+            out.append(f"scraper_phase_seconds_count{_prom_labels(base)} {len(values)}")
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            out.append(f"# TYPE scraper_{name}_total counter")
+            for (counter, labels), value in sorted(self.counters.items()):
+                if counter == name:
+                    out.append(f"scraper_{name}_total{_prom_labels((*labels, *run.items()))} {value:g}")
+        return "\n".join(out) + "\n"
+
+    def write_prometheus(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(path + ".tmp", path)
+
+metrics = Metrics()
+span = metrics.span
+count = metrics.count
+event = metrics.event
+scope = metrics.scope
@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncContextManager, Awaitable, Callable
+import httpx
+from scrapers.browser_pool import BrowserLaunchError, browser_pool
+from scrapers.http_tables import TableNotFound, fetch_html_table, new_client
+from scrapers.journal import PageJournal
+from scrapers.metrics import count, event, span
+from scrapers.tables import Column, Table, extract_table
+from scrapers.throttle import backoff_delay, host_controller
+
+CONCURRENCY = 6
+RETRIES = 3
+# Tanpa --end: batas keras jumlah page, kalau penanda akhir listing gak pernah muncul
+MAX_PAGES = int(os.getenv("SCRAPER_MAX_PAGES", "5000"))
+# Sekian page berturut-turut gagal total = situsnya bermasalah, crawl dihentikan
+MAX_FAILURES_IN_A_ROW = 5
+
+# browser: Playwright saja; http: httpx saja; auto: httpx, fallback ke browser
+MODES = ("browser", "http", "auto")
+
+Fetcher = Callable[[int], Awaitable[Table]]
+
+class PageMissing(Exception):
+    """The page doesn't exist (4xx) or has no table, e.g. past the end of the listing."""
+
+def parse_page_args(start_page: int = 1) -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start", type=int, default=start_page, help="first page to crawl")
+    parser.add_argument("--end", type=int, default=None, help="last page to crawl; default: stop at the first empty page")
+    parser.add_argument("--resume", action="store_true", help="continue from the page journal of the previous run")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--mode", choices=MODES, default="browser", help="how pages are fetched")
+    return parser.parse_args()
+
+async def crawl_pages(
+    open_fetcher: Callable[[], AsyncContextManager[Fetcher]],
+    build_row: Callable[[dict], dict | None],
+    start_page: int,
+    end_page: int | None,
+    concurrency: int = CONCURRENCY,
+    retries: int = RETRIES,
+    journal: PageJournal | None = None,
+    resume: bool = False,
+    max_pages: int = MAX_PAGES,
+) -> list[dict]:
+    """Fetch a page range with `concurrency` workers and return rows in page order.
+
+    Each worker opens its own fetcher with `open_fetcher()` and calls it with
+    page numbers. Every record goes through `build_row`; records it returns
+    None for are dropped. Failed pages are retried up to `retries` times after
+    a jittered backoff; a BrowserLaunchError aborts the crawl instead.
+    Requests themselves go through the per-host controller in throttle.py,
+    which should be told not to retry on its own (`retries=0`): these page
+    retries already cover its failures.
+
+    With `end_page=None` the listing ends at the first page whose table is
+    empty or that raises PageMissing, or at a page that still fails after
+    its retries while no later page has returned rows yet; at most
+    `max_pages` pages are crawled. With an `end_page`, PageMissing is an
+    ordinary failure. Either way the crawl stops after
+    MAX_FAILURES_IN_A_ROW pages in a row failed for good.
+
+    Finished pages are written to `journal`; with `resume` the pages
+    already in it are reused instead of fetched again.
+    """
+    done: dict[int, list[dict] | None] = {}
+    if journal:
+        if resume:
+            done = journal.load()
+            print(f"Resuming: {len(done)} pages already in {journal.path}")
+        else:
+            journal.reset()
+
+    last_page = end_page
+    empty = [n for n, rows in done.items() if rows is None and n >= start_page]
+    if empty and last_page is None:
+        last_page = min(empty) - 1
+
+    if end_page is None:
+        page_cap = start_page + max_pages - 1
+        last_page = min(last_page, page_cap) if last_page is not None else None
+    next_page = start_page
+    retry: list[tuple[int, int]] = []
+    failed: list[int] = []
+    # Page terakhir yang ada isinya; akhir listing yang ditebak dari page gagal
+    last_good = max((n for n, rows in done.items() if rows), default=start_page - 1)
+    end_from_failure = False
+    failures_in_a_row = 0
+    stopped = False
+    capped = False
+
+    def take() -> tuple[int, int] | None:
+        nonlocal next_page, capped
+        if stopped:
+            return None
+        while retry:
+            page_num, attempt = retry.pop()
+            # Retry untuk page sesudah akhir listing gak perlu lagi
+            if last_page is None or page_num <= last_page:
+                return page_num, attempt
+        while last_page is None or next_page <= last_page:
+            if end_page is None and next_page > page_cap:
+                if not capped:
+                    capped = True
+                    print(f"Stopping at the page cap ({max_pages} pages from {start_page})")
+                return None
+            page_num = next_page
+            next_page += 1
+            if page_num not in done:
+                return page_num, 1
+        return None
+
+    def end_listing(page_num: int):
+        # Akhir listing ada di sebelum page_num (kalau belum ketemu yang lebih awal)
+        nonlocal last_page
+        if end_page is None and (last_page is None or page_num <= last_page):
+            last_page = page_num - 1
+
+    async def worker():
+        nonlocal last_page, last_good, end_from_failure, failures_in_a_row, stopped
+        async with open_fetcher() as fetch:
+            while (task := take()) is not None:
+                page_num, attempt = task
+                try:
+                    try:
+                        with span("page"):
+                            table = await fetch(page_num)
+                    except PageMissing as e:
+                        # Dengan --end, page yang hilang di tengah range tetap dianggap gagal
+                        if end_page is not None:
+                            raise
+                        print(f"PAGE: {page_num} missing ({e}), treating it as the end of the listing")
+                        table = Table([], [])
+                    count("pages")
+                    failures_in_a_row = 0
+                    if not table.records:
+                        data = None
+                        end_listing(page_num)
+                        if last_page == page_num - 1:
+                            end_from_failure = False
+                        print(f"PAGE: {page_num} (empty)")
+                    else:
+                        data = [item for item in map(build_row, table.records) if item]
+                        count("rows", len(data))
+                        print(f"PAGE: {page_num} ({len(data)} rows)")
+                        last_good = max(last_good, page_num)
+                        if end_from_failure and last_page is not None and page_num > last_page:
+                            # Ternyata listing-nya masih lanjut: page yang gagal tadi cuma gagal biasa
+                            last_page, end_from_failure = None, False
+                    event("page", page=page_num, attempt=attempt, rows=len(data) if data else 0)
+
+                    done[page_num] = data
+                    if journal:
+                        journal.record(page_num, data)
+                except BrowserLaunchError:
+                    # Bukan salah page-nya: tanpa browser semua page pasti gagal
+                    raise
+                except Exception as e:
+                    event("page_error", page=page_num, attempt=attempt, error=repr(e))
+                    if attempt < retries:
+                        print(f"PAGE: {page_num} failed (attempt {attempt}/{retries}), retrying: {e}")
+                        count("retries")
+                        # Jeda dulu; langsung diulang biasanya gagal lagi karena sebab yang sama
+                        await asyncio.sleep(backoff_delay(attempt))
+                        retry.append((page_num, attempt + 1))
+                        continue
+
+                    print(f"PAGE: {page_num} failed after {retries} attempts: {e}")
+                    count("failed_pages")
+                    failed.append(page_num)
+                    if last_page is not None and page_num > last_page:
+                        continue
+                    if end_page is None and page_num > last_good:
+                        # Belum ada page sesudahnya yang berisi: kemungkinan besar sudah lewat akhir listing
+                        print(f"PAGE: {page_num} is past the last page with rows ({last_good}), ending the listing there")
+                        end_listing(page_num)
+                        end_from_failure = True
+                        continue
+                    failures_in_a_row += 1
+                    if failures_in_a_row >= MAX_FAILURES_IN_A_ROW and not stopped:
+                        print(f"{failures_in_a_row} pages in a row failed, stopping the crawl")
+                        stopped = True
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    # Page gagal sesudah akhir listing bukan kegagalan sungguhan
+    failed = [n for n in failed if last_page is None or n <= last_page]
+    if failed or stopped:
+        print(f"Failed pages: {sorted(failed)} (rerun with --resume to retry them)")
+    if end_from_failure:
+        print(f"End of listing guessed from failed page {last_page + 1}; rerun with --resume if it goes further")
+        event("end_from_failure", page=last_page + 1)
+    if not any(rows for n, rows in done.items() if n >= start_page) and (failed or end_from_failure or stopped):
+        # Semua gagal (situs down, diblokir): jangan diam-diam balikin hasil kosong
+        raise RuntimeError(f"no page could be fetched from page {start_page} on")
+
+    data = []
+    for page_num in sorted(done):
+        if page_num < start_page or (last_page is not None and page_num > last_page):
+            continue
+        data.extend(done[page_num] or [])
+    return data
+
+async def scrape_table_pages(
+    url_template: str,
+    columns: list[Column],
+    build_row: Callable[[dict], dict | None],
+    start_page: int,
+    end_page: int | None,
+    table_selector: str = "table",
+    row_selector: str = "tbody tr",
+    cell_selector: str = "td",
+    concurrency: int = CONCURRENCY,
+    retries: int = RETRIES,
+    timeout: int = 15000,
+    journal: PageJournal | None = None,
+    resume: bool = False,
+    mode: str = "browser",
+) -> list[dict]:
+    """Scrape a paginated HTML table, `url_template` formatted with `page=<n>`.
+
+    In "browser" mode each page is loaded on a page borrowed from the shared
+    browser pool and the table is pulled in one evaluate call. "http" fetches
+    the server-rendered HTML with httpx and parses it with the same `columns`;
+    "auto" does the same but falls back to the browser for pages whose raw
+    HTML has no table rows. The browser is only launched once a page
+    actually needs it.
+    See crawl_pages for paging, retries and the journal.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+
+    async with AsyncExitStack() as stack:
+        client = await stack.enter_async_context(new_client(concurrency)) if mode != "browser" else None
+        # Pool bersama: browser baru di-launch waktu ada page yang butuh
+        pool = await stack.enter_async_context(browser_pool())
+
+        @asynccontextmanager
+        async def open_fetcher():
+            async def fetch(page_num: int) -> Table:
+                url = url_template.format(page=page_num)
+                if client is not None:
+                    try:
+                        table = await fetch_html_table(client, url, columns, table_selector, row_selector, cell_selector, retries=0)
+                        # tabel kosong di HTML bisa berarti diisi JS, cek sekali lagi di browser
+                        if table.records or mode == "http":
+                            return table
+                    except TableNotFound as e:
+                        if mode == "http":
+                            raise PageMissing(f"no table matching {e}") from e
+                    except httpx.HTTPStatusError as e:
+                        if 400 <= e.response.status_code < 500:
+                            raise PageMissing(f"HTTP {e.response.status_code}") from e
+                        raise
+                    print(f"PAGE: {page_num} has no server-rendered rows, using the browser")
+                    count("browser_fallbacks")
+
+                async with pool.page() as page:
+                    with span("goto"):
+                        # Retry cukup di crawl_pages, controller cuma mengatur laju
+                        response = await host_controller(url).request(lambda: page.goto(url), retries=0)
+                    if response is not None:
+                        sizes = await response.request.sizes()
+                        count("bytes", sizes["responseBodySize"] + sizes["responseHeadersSize"], via="browser")
+                    status = response.status if response is not None else 200
+                    # 4xx dilempar setelah page-nya balik ke pool, bukan di dalam blok
+                    if not 400 <= status < 500:
+                        with span("wait_for_selector"):
+                            await page.wait_for_selector(table_selector, timeout=timeout)
+                        with span("extract"):
+                            return await extract_table(page, columns, table_selector, row_selector, cell_selector)
+                raise PageMissing(f"HTTP {status}")
+
+            yield fetch
+
+        return await crawl_pages(
+            open_fetcher, build_row, start_page, end_page,
+            concurrency=concurrency, retries=retries, journal=journal, resume=resume,
+        )
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+from scrapers.metrics import metrics, scope, span
+
+PIPELINE_DIR = "files/pipeline"
+STATE_PATH = os.path.join(PIPELINE_DIR, "state.json")
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of the ingredient refresh.
+
+    `inputs`/`outputs` are files; `after` names upstream stages whose results
+    this one consumes. `remote` stages read from the web, so their inputs
+    can't be hashed: they always run and only their output hash decides
+    whether downstream stages have work to do. Offline they never run: their
+    last output is reused, and without one they are blocked.
+    """
+    name: str
+    run: Callable
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    remote: bool = False
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def combine(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+def load_state(path: str = STATE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state: dict, path: str = STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def write_json(path: str, rows: list[dict]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # sort_keys biar hasil scrape yang sama menghasilkan hash yang sama
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, sort_keys=True, indent=0)
+    os.replace(path + ".tmp", path)
+
+def read_json(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def toposort(stages: dict[str, Stage]) -> list[str]:
+    order, visiting, done = [], set(), set()
+
+    def visit(name: str):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage cycle through {name}")
+        visiting.add(name)
+        for dep in stages[name].after:
+            if dep not in stages:
+                raise ValueError(f"{name} depends on unknown stage {dep}")
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in stages:
+        visit(name)
+    return order
+
+def upstream(stages: dict[str, Stage], targets: list[str]) -> set[str]:
+    """`targets` plus every stage they (transitively) depend on."""
+    selected, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in selected:
+            selected.add(name)
+            todo.extend(stages[name].after)
+    return selected
+
+class Pipeline:
+    """Runs a DAG of stages, skipping the ones whose inputs didn't change.
+
+    A stage's fingerprint hashes its input files together with the output
+    digests of its upstream stages. When it matches the fingerprint stored
+    from the last successful run (and the outputs still exist) the stage is
+    skipped. A stage's output digest is the hash of its output files, or its
+    fingerprint when it only writes to the DB, so a change anywhere only
+    re-runs what is downstream of it. Independent stages run concurrently:
+    async stages on the event loop, sync ones in a thread.
+    """
+
+    def __init__(self, stages: list[Stage], state_path: str = STATE_PATH):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = toposort(self.stages)
+        self.state_path = state_path
+        self.state = load_state(state_path)
+
+    def fingerprint(self, stage: Stage, digests: dict[str, str], offline: bool) -> str | None:
+        """Fingerprint of `stage` now, or None when it has to run regardless."""
+        if stage.remote:
+            if not offline:
+                return None
+            # Offline: pakai hasil scrape terakhir apa adanya
+            return combine(stage.name, *self.output_digest(stage, None))
+        parts = [stage.name]
+        for path in stage.inputs:
+            parts.append(file_digest(path) if os.path.exists(path) else "missing")
+        parts.extend(digests[dep] for dep in stage.after)
+        return combine(*parts)
+
+    def output_digest(self, stage: Stage, fingerprint: str | None) -> list[str]:
+        if not stage.outputs:
+            return [fingerprint or ""]
+        return [file_digest(path) if os.path.exists(path) else "missing" for path in stage.outputs]
+
+    def offline_blocked(self, stage: Stage, offline: bool) -> bool:
+        """Whether `stage` can't run because it needs the web and has no earlier output."""
+        return offline and stage.remote and not all(os.path.exists(path) for path in stage.outputs)
+
+    def is_fresh(self, stage: Stage, fingerprint: str | None, offline: bool = False) -> bool:
+        if stage.remote and offline:
+            return all(os.path.exists(path) for path in stage.outputs)
+        entry = self.state.get(stage.name)
+        return (
+            fingerprint is not None
+            and entry is not None
+            and entry["fingerprint"] == fingerprint
+            and all(os.path.exists(path) for path in stage.outputs)
+        )
+
+    def plan(self, targets: list[str] | None = None, force: set[str] = frozenset(), offline: bool = False) -> dict[str, str]:
+        """Stage → "run"/"skip"/"blocked" as far as it can be told before running anything.
+
+        Downstream of a stage that runs is reported as "run?": whether it
+        really runs depends on the new output.
+        """
+        selected = upstream(self.stages, targets) if targets else set(self.stages)
+        plan, digests = {}, {}
+        for name in self.order:
+            if name not in selected:
+                continue
+            stage = self.stages[name]
+            if self.offline_blocked(stage, offline) or any(plan[dep] == "blocked" for dep in stage.after):
+                plan[name] = "blocked"
+                digests[name] = ""
+                continue
+            if any(plan[dep] != "skip" for dep in stage.after) and name not in force:
+                plan[name] = "run?"
+                digests[name] = ""
+                continue
+            fp = self.fingerprint(stage, digests, offline)
+            # Offline, stage remote yang output-nya ada selalu di-skip (--force juga)
+            fresh = self.is_fresh(stage, fp, offline)
+            plan[name] = "skip" if fresh and (name not in force or stage.remote and offline) else "run"
+            digests[name] = combine(*self.output_digest(stage, fp))
+        return plan
+
+    async def run(self, targets: list[str] | None = None, force: set[str] = frozenset(), offline: bool = False) -> dict[str, str]:
+        """Run the selected stages; returns stage → "ran"/"skipped"/"failed"/"blocked"."""
+        selected = upstream(self.stages, targets) if targets else set(self.stages)
+        digests: dict[str, str] = {}
+        results: dict[str, str] = {}
+        done = {name: asyncio.Event() for name in selected}
+
+        async def run_stage(name: str):
+            stage = self.stages[name]
+            try:
+                for dep in stage.after:
+                    await done[dep].wait()
+                if any(results[dep] in ("failed", "blocked") for dep in stage.after):
+                    results[name] = "blocked"
+                    print(f"[{name}] blocked by an upstream stage that failed or couldn't run")
+                    return
+
+                if self.offline_blocked(stage, offline):
+                    results[name] = "blocked"
+                    print(f"[{name}] needs the web and has no earlier output to reuse offline, blocked")
+                    return
+
+                fp = await asyncio.to_thread(self.fingerprint, stage, digests, offline)
+                if self.is_fresh(stage, fp, offline) and (name not in force or stage.remote and offline):
+                    digests[name] = combine(*self.output_digest(stage, fp))
+                    results[name] = "skipped"
+                    print(f"[{name}] up to date, skipped")
+                    return
+
+                print(f"[{name}] running")
+                started = time.perf_counter()
+                try:
+                    # Semua span/counter di dalam stage dapat label stage=<name>
+                    with scope(stage=name), span("stage"):
+                        if inspect.iscoroutinefunction(stage.run):
+                            await stage.run()
+                        else:
+                            await asyncio.to_thread(stage.run)
+                except Exception as e:
+                    results[name] = "failed"
+                    metrics.event("stage_failed", stage=name, error=repr(e))
+                    print(f"[{name}] failed: {e!r}")
+                    return
+
+                # Stage remote baru punya fingerprint setelah output-nya ada
+                output = await asyncio.to_thread(self.output_digest, stage, fp)
+                digests[name] = combine(*output)
+                self.state[name] = {
+                    "fingerprint": fp or combine(name, *output),
+                    "output": digests[name],
+                    "ran_at": datetime.now(timezone.utc).isoformat(),
+                    "seconds": round(time.perf_counter() - started, 1),
+                }
+                save_state(self.state, self.state_path)
+                results[name] = "ran"
+                print(f"[{name}] done in {self.state[name]['seconds']}s")
+            finally:
+                done[name].set()
+
+        order = [name for name in self.order if name in selected]
+        await asyncio.gather(*(run_stage(name) for name in order))
+        return {name: results[name] for name in order}
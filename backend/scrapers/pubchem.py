@@ -0,0 +1,140 @@
+import asyncio
+import json
+import sqlite3
+import time
+import httpx
+from scrapers.metrics import count, span
+from scrapers.throttle import HostController
+
+PUBCHEM_HOST = "pubchem.ncbi.nlm.nih.gov"
+# {cas} diisi belakangan lewat .format(), jadi bukan f-string
+SYNONYMS_URL = "https://" + PUBCHEM_HOST + "/rest/pug/compound/name/{cas}/synonyms/JSON"
+CACHE_PATH = "files/pubchem_cache.sqlite"
+
+CONCURRENCY = 4
+# PubChem minta maksimal 5 request per detik
+REQUESTS_PER_SECOND = 5
+# CAS yang gak ketemu dicoba lagi setelah seminggu
+NEGATIVE_TTL = 7 * 24 * 3600
+
+def pick_inci(synonyms: list[str]) -> str:
+    # INCI names biasanya all-caps dan tidak mengandung karakter aneh
+    for syn in synonyms:
+        if syn.isupper() and len(syn) > 2 and not syn.startswith("DTXSID") and not syn.startswith("CHEBI"):
+            return syn
+
+    # Fallback: return synonym pertama
+    return synonyms[0]
+
+class SynonymCache:
+    """CAS → PubChem synonyms in SQLite, including CAS numbers PubChem doesn't know."""
+
+    def __init__(self, path: str = CACHE_PATH, negative_ttl: float = NEGATIVE_TTL):
+        self.negative_ttl = negative_ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS synonyms (cas TEXT PRIMARY KEY, synonyms TEXT, fetched_at REAL NOT NULL)"
+        )
+
+    def get(self, cas: str) -> tuple[bool, list[str] | None]:
+        """Return (hit, synonyms); an expired negative entry counts as a miss."""
+        row = self.conn.execute("SELECT synonyms, fetched_at FROM synonyms WHERE cas = ?", (cas,)).fetchone()
+        if row is None:
+            return False, None
+        synonyms, fetched_at = row
+        if synonyms is None:
+            return time.time() - fetched_at < self.negative_ttl, None
+        return True, json.loads(synonyms)
+
+    def put(self, cas: str, synonyms: list[str] | None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO synonyms VALUES (?, ?, ?)",
+            (cas, json.dumps(synonyms) if synonyms is not None else None, time.time()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+class CasResolver:
+    """Resolve CAS numbers to INCI-like names through one pooled PubChem client.
+
+    Lookups go through a HostController (adaptive concurrency up to
+    `concurrency`, at most `per_second` requests, retries with backoff) and a
+    persistent SynonymCache, so re-runs mostly skip the network. CAS numbers
+    whose lookup still failed end up in `failed`; they aren't cached, so the
+    next run tries them again.
+
+        async with CasResolver() as resolver:
+            names = await resolver.resolve_many(cas_numbers)
+    """
+
+    def __init__(
+        self,
+        cache_path: str = CACHE_PATH,
+        concurrency: int = CONCURRENCY,
+        per_second: float = REQUESTS_PER_SECOND,
+    ):
+        self.cache = SynonymCache(cache_path)
+        self.controller = HostController(PUBCHEM_HOST, rate=per_second, burst=int(per_second), max_concurrency=concurrency)
+        self.client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self.hits = 0
+        self.fetched = 0
+        self.failed: list[str] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        self.cache.close()
+
+    async def fetch_synonyms(self, cas: str) -> list[str] | None:
+        hit, synonyms = self.cache.get(cas)
+        if hit:
+            self.hits += 1
+            count("pubchem_cache_hits")
+            return synonyms
+
+        url = SYNONYMS_URL.format(cas=cas)
+        try:
+            with span("pubchem_get"):
+                res = await self.controller.request(lambda: self.client.get(url))
+        except httpx.HTTPError as e:
+            print(f"PubChem request failed for {cas}: {e}")
+            count("pubchem_errors")
+            self.failed.append(cas)
+            return None
+        self.fetched += 1
+        count("bytes", res.num_bytes_downloaded, via="pubchem")
+        count("pubchem_responses", status=res.status_code)
+
+        if res.status_code == 404:
+            synonyms = None
+        elif res.status_code != 200:
+            # Masih error setelah retry (503 dll), jangan di-cache
+            print(f"PubChem returned {res.status_code} for {cas}")
+            count("pubchem_errors")
+            self.failed.append(cas)
+            return None
+        else:
+            try:
+                synonyms = res.json()["InformationList"]["Information"][0]["Synonym"] or None
+            except (ValueError, KeyError, IndexError):
+                synonyms = None
+
+        self.cache.put(cas, synonyms)
+        return synonyms
+
+    async def resolve(self, cas: str) -> str | None:
+        synonyms = await self.fetch_synonyms(cas)
+        return pick_inci(synonyms) if synonyms else None
+
+    async def resolve_many(self, cas_numbers: list[str]) -> dict[str, str | None]:
+        unique = list(dict.fromkeys(cas_numbers))
+        names = await asyncio.gather(*(self.resolve(cas) for cas in unique))
+        print(f"Resolved {len(unique)} CAS numbers: {self.hits} from cache, {self.fetched} fetched, {len(self.failed)} failed")
+        return dict(zip(unique, names))
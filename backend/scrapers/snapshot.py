@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+from typing import Iterator
+from scrapers.batch import iter_rows
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+SNAPSHOT_DIR = "files/snapshots"
+STATE_FILE = "state.json"
+
+# Tabel → kolom high-water mark untuk refresh incremental
+TABLES = {
+    "ingredient_master": "updated_at",
+    "brands": "updated_at",
+    "products": "updated_at",
+}
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Snapshots need pyarrow: install it with `uv sync --extra snapshot`")
+
+def snapshot_path(table: str, directory: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(directory, f"{table}.parquet")
+
+def load_state(directory: str = SNAPSHOT_DIR) -> dict:
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state: dict, directory: str = SNAPSHOT_DIR):
+    path = os.path.join(directory, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def _write(table: "pa.Table", path: str):
+    pq.write_table(table, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+def _max_timestamp(rows: list[dict], column: str, current: str | None) -> str | None:
+    values = [row[column] for row in rows if row.get(column)]
+    if current:
+        values.append(current)
+    return max(values, key=datetime.fromisoformat) if values else None
+
+def refresh_table(table: str, full: bool = False, directory: str = SNAPSHOT_DIR) -> dict:
+    """Bring the snapshot of `table` up to date and return its state entry.
+
+    Without `full`, only rows whose high-water-mark column is at or after the
+    recorded mark are fetched and replace their old version by id. Deleted
+    rows are only dropped by a full refresh (or forget_rows). Tables without
+    the mark column are always refreshed in full. A full refresh of an empty
+    table keeps the old snapshot's columns, or writes no file if there is none.
+    """
+    _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    state = load_state(directory)
+    entry = state.get(table, {})
+    column = TABLES.get(table)
+    path = snapshot_path(table, directory)
+
+    mark = entry.get("high_water_mark")
+    incremental = not full and column and mark and os.path.exists(path)
+
+    if incremental:
+        rows = list(iter_rows(table, prefetch=True, where=lambda q: q.gte(column, mark)))
+        changed = pa.Table.from_pylist(rows) if rows else None
+        old = pq.read_table(path)
+        if changed is not None:
+            keep = pc.invert(pc.is_in(old["id"], value_set=changed["id"]))
+            merged = pa.concat_tables([old.filter(keep), changed], promote_options="default")
+        else:
+            merged = old
+    else:
+        rows = list(iter_rows(table, prefetch=True))
+        if rows:
+            merged = pa.Table.from_pylist(rows)
+        elif os.path.exists(path):
+            # Tabel kosong: pertahankan kolom snapshot lama, from_pylist([]) gak punya kolom
+            merged = pq.read_schema(path).empty_table()
+        else:
+            merged = None
+
+    if merged is not None:
+        _write(merged, path)
+    if column and rows and column not in rows[0]:
+        column = None
+
+    entry = {
+        "high_water_mark": _max_timestamp(rows, column, mark) if column else None,
+        "rows": merged.num_rows if merged is not None else 0,
+        "fetched": len(rows),
+        "mode": "incremental" if incremental else "full",
+        "refreshed_at": datetime.now(timezone.utc).isoformat(),
+    }
+    state[table] = entry
+    save_state(state, directory)
+    if merged is None:
+        print(f"{table}: empty, no snapshot written")
+    else:
+        print(f"{table}: {entry['mode']} refresh, fetched {len(rows)}, snapshot has {merged.num_rows} rows")
+    return entry
+
+def forget_rows(table: str, ids: list, directory: str = SNAPSHOT_DIR):
+    """Drop `ids` from the snapshot after they were deleted in the DB."""
+    _require_pyarrow()
+    path = snapshot_path(table, directory)
+    if not ids or not os.path.exists(path):
+        return
+    old = pq.read_table(path)
+    keep = pc.invert(pc.is_in(old["id"], value_set=pa.array(ids, type=old["id"].type)))
+    _write(old.filter(keep), path)
+
+def load_table(table: str, columns: list[str] | None = None, directory: str = SNAPSHOT_DIR) -> "pa.Table":
+    """Snapshot of `table` as an Arrow table, optionally only `columns`."""
+    _require_pyarrow()
+    path = snapshot_path(table, directory)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No snapshot of {table}; run `python -m scrapers.snapshot {table}` first")
+    return pq.read_table(path, columns=columns)
+
+def iter_snapshot_rows(table: str, columns: str = "*", directory: str = SNAPSHOT_DIR) -> Iterator[dict]:
+    """Drop-in for batch.iter_rows that reads the local snapshot in batches."""
+    names = None if columns == "*" else [c.strip() for c in columns.split(",")]
+    for batch in load_table(table, names, directory).to_batches():
+        yield from batch.to_pylist()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("tables", nargs="*", default=list(TABLES), help="tables to snapshot")
+    parser.add_argument("--full", action="store_true", help="re-download instead of fetching changed rows only")
+    args = parser.parse_args()
+
+    for table in args.tables:
+        refresh_table(table, full=args.full)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from scrapers.batch import fetch_rows, upsert_chunks
+from scrapers.metrics import count
+
+SYNC_DIR = "files/sync"
+# Berapa nama yang dicetak di laporan baris yang hilang; daftar lengkapnya ada di file
+REPORT_SAMPLE = 10
+
+def _normal(value):
+    # DB balikin 70.0 untuk angka yang di-scrape sebagai 70
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def row_hash(row: dict) -> str:
+    """Content hash of `row`, independent of key order and int/float spelling."""
+    data = json.dumps(
+        {k: _normal(v) for k, v in row.items()},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+@dataclass
+class Diff:
+    inserted: list[dict] = field(default_factory=list)
+    modified: list[dict] = field(default_factory=list)
+    unchanged: int = 0
+    # Key yang pernah di-sync tapi gak ada di hasil scrape ini
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> list[dict]:
+        return self.inserted + self.modified
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.inserted)} new, {len(self.modified)} modified, "
+            f"{self.unchanged} unchanged, {len(self.removed)} not in this scrape"
+        )
+
+class SyncState:
+    """Content hash of every row a feed last wrote, keyed by its `key` column.
+
+    Kept in SYNC_DIR/<name>.json. `diff` splits a fresh scrape into new,
+    modified and unchanged rows plus the known keys it doesn't contain;
+    `commit` records the rows that actually reached the DB. Keys missing
+    from a scrape keep their hash, since a partial scrape (a --start/--end
+    slice, failed pages or profiles) looks the same as rows gone upstream.
+    Delete the file to compare against the DB again on the next run.
+    """
+
+    def __init__(self, name: str, key: str, directory: str = SYNC_DIR):
+        self.name = name
+        self.key = key
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name}.json")
+        self.hashes: dict[str, str] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.hashes = json.load(f)["rows"]
+
+    def seed(self, db_rows: list[dict], fields: list[str], keys: set[str]):
+        """Start from what the DB already holds for `keys`, compared on `fields` only."""
+        for row in db_rows:
+            if row.get(self.key) in keys:
+                self.hashes[row[self.key]] = row_hash({f: row.get(f) for f in fields})
+
+    def diff(self, rows: list[dict]) -> Diff:
+        diff = Diff()
+        seen = set()
+        for row in rows:
+            key = row[self.key]
+            seen.add(key)
+            old = self.hashes.get(key)
+            if old is None:
+                diff.inserted.append(row)
+            elif old != row_hash(row):
+                diff.modified.append(row)
+            else:
+                diff.unchanged += 1
+        diff.removed = sorted(key for key in self.hashes if key not in seen)
+        return diff
+
+    def commit(self, written: list[dict]):
+        for row in written:
+            self.hashes[row[self.key]] = row_hash(row)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "key": self.key,
+                "synced_at": datetime.now(timezone.utc).isoformat(),
+                "rows": self.hashes,
+            }, f, ensure_ascii=False)
+        os.replace(self.path + ".tmp", self.path)
+
+    def report_removed(self, removed: list[str]) -> str | None:
+        """Write the keys missing from this scrape to SYNC_DIR/<name>-removed.json."""
+        path = os.path.join(self.directory, f"{self.name}-removed.json")
+        if not removed:
+            # Laporan run sebelumnya sudah gak berlaku
+            if os.path.exists(path):
+                os.remove(path)
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "feed": self.name,
+                "reported_at": datetime.now(timezone.utc).isoformat(),
+                self.key: removed,
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+def sync_rows(name: str, table: str, rows: list[dict], key: str, dry_run: bool = False) -> Diff:
+    """Upsert only the `rows` that are new or changed since feed `name` last synced.
+
+    Without a saved state (first run) the current DB rows seed it, so rows
+    that already match aren't rewritten. Known rows missing from `rows` are
+    only reported: they are neither deleted nor forgotten, so a partial
+    scrape doesn't make the next full one rewrite them. With `dry_run`
+    nothing is written, not even the state.
+    """
+    state = SyncState(name, key)
+    if not state.hashes and rows:
+        fields = list(dict.fromkeys(f for row in rows for f in row))
+        state.seed(fetch_rows(table, ",".join(fields)), fields, {row[key] for row in rows})
+
+    diff = state.diff(rows)
+    for kind, value in (("new", len(diff.inserted)), ("modified", len(diff.modified)),
+                        ("unchanged", diff.unchanged), ("removed", len(diff.removed))):
+        count("sync_rows", value, feed=name, kind=kind)
+    print(f"{name}: {diff.summary()}")
+    if dry_run:
+        return diff
+
+    written: list[dict] = []
+    if diff.changed:
+        print(f"Upserting {len(diff.changed)} rows into {table}...")
+        upsert_chunks(table, diff.changed, on_conflict=key, on_written=written.extend)
+    # Chunk yang gagal gak dicatat, jadi run berikutnya dikirim lagi
+    state.commit(written)
+
+    path = state.report_removed(diff.removed)
+    if path:
+        sample = ", ".join(diff.removed[:REPORT_SAMPLE])
+        more = f" and {len(diff.removed) - REPORT_SAMPLE} more" if len(diff.removed) > REPORT_SAMPLE else ""
+        print(f"{len(diff.removed)} known rows not in this scrape (gone upstream or not crawled, not deleted): "
+              f"{sample}{more}; full list in {path}")
+    return diff
@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from typing import Any, Callable, NamedTuple
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    index: int
+    parse: Callable[[str], Any] = str
+
+class Table(NamedTuple):
+    headers: list[str]
+    records: list[dict]
+
+# Runs in the browser: one round trip returns every header and cell text.
+EXTRACT_JS = """([tableSelector, rowSelector, cellSelector]) => {
+    const table = document.querySelector(tableSelector)
+    if (!table) return {headers: [], rows: []}
+    const headers = Array.from(table.querySelectorAll('thead th')).map(th => th.innerText.trim())
+    const rows = Array.from(table.querySelectorAll(rowSelector)).map(
+        row => Array.from(row.querySelectorAll(cellSelector)).map(cell => cell.innerText.trim())
+    )
+    return {headers, rows}
+}"""
+
+def parse_pct(raw: str) -> float:
+    return float(raw.replace("%", "").replace(",", "."))
+
+def split_list(raw: str) -> list[str]:
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+def to_records(rows: list[list[str]], columns: list[Column]) -> list[dict]:
+    """Map raw cell texts onto `columns`.
+
+    Rows too short for the schema are dropped, as are rows where a column's
+    parser raises ValueError.
+    """
+    width = max(col.index for col in columns) + 1
+    records = []
+    for cells in rows:
+        if len(cells) < width:
+            continue
+        try:
+            records.append({col.name: col.parse(cells[col.index]) for col in columns})
+        except ValueError as e:
+            print(f"ValueError: {e} in row {cells[:2]}")
+    return records
+
+async def extract_table(
+    page,
+    columns: list[Column],
+    table_selector: str = "table",
+    row_selector: str = "tbody tr",
+    cell_selector: str = "td",
+) -> Table:
+    raw = await page.evaluate(EXTRACT_JS, [table_selector, row_selector, cell_selector])
+    return Table(raw["headers"], to_records(raw["rows"], columns))
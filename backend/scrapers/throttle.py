@@ -0,0 +1,231 @@
+import asyncio
+import os
+import random
+import time
+import weakref
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+from urllib.parse import urlsplit
+import httpx
+from scrapers.metrics import count, event, span
+
+R = TypeVar("R")
+
+# Default per host, bisa dioverride lewat env
+RATE = float(os.getenv("SCRAPER_HOST_RATE", "5"))
+BURST = int(os.getenv("SCRAPER_HOST_BURST", "10"))
+MAX_CONCURRENCY = int(os.getenv("SCRAPER_HOST_CONCURRENCY", "8"))
+INITIAL_CONCURRENCY = 2
+RETRIES = int(os.getenv("SCRAPER_HOST_RETRIES", "4"))
+
+# Backoff eksponensial (detik) dengan full jitter; Retry-After dari server dipakai kalau lebih lama
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_AFTER_MAX = 120.0
+# Beberapa kegagalan barengan cuma dihitung satu kali turun
+DECREASE_WINDOW = 1.0
+
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+# Status yang berarti "pelan-pelan": rate ikut dipotong, bukan cuma concurrency
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# Server lokal (benchmark, dev) gak perlu dijaga
+LOCAL_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+HOST_LIMITS: dict[str, dict] = {
+    # PubChem minta maksimal 5 request per detik
+    "pubchem.ncbi.nlm.nih.gov": {"rate": 5, "burst": 5, "max_concurrency": 4},
+}
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Seconds to wait before retry number `attempt` (1-based)."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, RETRY_AFTER_MAX))
+    return delay
+
+def retry_after(response) -> float | None:
+    """The Retry-After of an httpx or Playwright response, in seconds."""
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def status_of(response) -> int | None:
+    # httpx: status_code; Playwright: status; goto bisa return None
+    if response is None:
+        return None
+    return getattr(response, "status_code", None) or getattr(response, "status", None)
+
+def is_transient(e: BaseException) -> bool:
+    if isinstance(e, (TimeoutError, httpx.TransportError)):
+        return True
+    # Playwright punya TimeoutError sendiri; error jaringannya cuma kelihatan dari pesan
+    return "Timeout" in type(e).__name__ or "net::ERR_" in str(e)
+
+class HostController:
+    """Rate, concurrency and retry policy for one host, shared by every request to it.
+
+    Requests start under a token bucket (`rate` per second, up to `burst` at
+    once) and an adaptive concurrency limit: it grows by about one per
+    round of successful requests up to `max_concurrency` and halves on
+    timeouts, connection errors and 5xx/429 responses (AIMD). 429 and 503
+    also halve the rate, which creeps back up on success. Failed attempts are
+    retried with jittered exponential backoff; a Retry-After pauses the whole
+    host, not just the request that got it.
+
+    `rate=None` disables the token bucket.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float | None = RATE,
+        burst: int = BURST,
+        max_concurrency: int = MAX_CONCURRENCY,
+        initial_concurrency: int = INITIAL_CONCURRENCY,
+        retries: int = RETRIES,
+    ):
+        self.host = host
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(initial_concurrency, max_concurrency))
+        self.retries = retries
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.decreased_at = 0.0
+        self.cond = asyncio.Condition()
+        self.bucket = asyncio.Lock()
+
+    async def _take_token(self):
+        if self.rate is None:
+            return
+        async with self.bucket:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+                self.refilled = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def _wait_pause(self):
+        while (delay := self.paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the host's request slots (concurrency and rate) for the block.
+
+        A Retry-After pause is waited out before taking a slot, so paused
+        requests don't hold concurrency that nobody can use.
+        """
+        with span("throttle_wait", host=self.host):
+            while True:
+                await self._wait_pause()
+                async with self.cond:
+                    await self.cond.wait_for(lambda: self.in_flight < int(self.limit))
+                    self.in_flight += 1
+                try:
+                    await self._take_token()
+                except BaseException:
+                    await self._release()
+                    raise
+                if time.monotonic() >= self.paused_until:
+                    break
+                # Pause baru datang selama nunggu token: lepas slot-nya dulu
+                await self._release()
+        try:
+            yield
+        finally:
+            await self._release()
+
+    async def _release(self):
+        async with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def succeeded(self):
+        self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        if self.rate is not None and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def overloaded(self, throttled: bool = False, wait: float | None = None):
+        """Back off after a failed attempt; `wait` (Retry-After) pauses the host."""
+        now = time.monotonic()
+        if now - self.decreased_at >= DECREASE_WINDOW:
+            self.decreased_at = now
+            self.limit = max(1.0, self.limit / 2)
+            if throttled and self.rate is not None:
+                self.rate = max(self.max_rate / 16, self.rate / 2)
+            count("host_backoffs", host=self.host)
+            event("host_backoff", host=self.host, concurrency=int(self.limit), rate=self.rate, retry_after=wait)
+        if wait:
+            self.paused_until = max(self.paused_until, now + min(wait, RETRY_AFTER_MAX))
+            self.tokens = 0.0
+
+    async def request(self, send: Callable[[], Awaitable[R]], retries: int | None = None) -> R:
+        """Make one request with `send()` under this host's limits, retrying transient failures.
+
+        `send` returns an httpx or Playwright response (or None). Timeouts,
+        connection errors and RETRY_STATUSES responses are retried up to
+        `retries` times; after that the last response is returned, or the
+        last error raised, so callers see the failure instead of losing it.
+        Callers with their own retry loop pass `retries=0`, so a failure
+        costs one request per attempt of theirs, not one per attempt of both.
+        """
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        while True:
+            attempt += 1
+            async with self.slot():
+                try:
+                    response = await send()
+                except Exception as e:
+                    if not is_transient(e):
+                        raise
+                    self.overloaded()
+                    if attempt > retries:
+                        raise
+                    reason, wait = type(e).__name__, None
+                else:
+                    status = status_of(response)
+                    if status not in RETRY_STATUSES:
+                        self.succeeded()
+                        return response
+                    wait = retry_after(response)
+                    self.overloaded(status in THROTTLE_STATUSES, wait)
+                    if attempt > retries:
+                        return response
+                    reason = str(status)
+            delay = backoff_delay(attempt, wait)
+            count("request_retries", host=self.host)
+            event("request_retry", host=self.host, attempt=attempt, reason=reason, delay=round(delay, 2))
+            await asyncio.sleep(delay)
+
+# Controller terikat ke event loop, seperti pool browser
+_controllers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, HostController]]" = weakref.WeakKeyDictionary()
+
+def host_controller(url: str) -> HostController:
+    """The running loop's shared controller for the host of `url`."""
+    host = urlsplit(url).hostname or url
+    hosts = _controllers.setdefault(asyncio.get_running_loop(), {})
+    if host not in hosts:
+        if host in LOCAL_HOSTS:
+            options = {"rate": None, "initial_concurrency": 64, "max_concurrency": 64}
+        else:
+            options = HOST_LIMITS.get(host, {})
+        hosts[host] = HostController(host, **options)
+    return hosts[host]